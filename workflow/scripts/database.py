@@ -1,15 +1,31 @@
 """This module contains the Database class and driver classes for the database"""
 
-import sys
 import logging
 import importlib
 from abc import ABC, abstractmethod
 
+# Default logger of the classes in this module.
+_LOG = logging.getLogger(__name__)
+
+# Driver classes by engine name, filled in by the register_driver decorator.
+_DRIVERS = {}
+
+
+def register_driver(engine):
+    """
+    Register a driver class under the given engine name.
+    """
+    def decorator(driver_class):
+        _DRIVERS[engine.lower()] = driver_class
+        return driver_class
+    return decorator
+
+
 class DatabaseDriverBase(ABC):
     """
     Abstract base class for database drivers.
     """
-    def __init__(self, logger=logging.getLogger(), engine=None, git_provider=None,
+    def __init__(self, logger=_LOG, engine=None, git_provider=None,
                  db_config=None):
 
         if not db_config:
@@ -43,11 +59,12 @@ class DatabaseDriverBase(ABC):
         """
 
 
+@register_driver("neo4j")
 class Neo4jDriver(DatabaseDriverBase):
     """
     Database driver for Neo4j.
     """
-    def __init__(self, logger=logging.getLogger(), engine=None, git_provider=None,
+    def __init__(self, logger=_LOG, engine=None, git_provider=None,
                  db_config=None):
 
         super().__init__(logger, engine, git_provider, db_config)
@@ -124,7 +141,7 @@ class Database(DatabaseDriverBase):
     """
     Database class to interact with the database using the driver.
     """
-    def __init__(self, logger=logging.getLogger(), engine=None,
+    def __init__(self, logger=_LOG, engine=None,
                  git_provider=None, db_config=None):
 
         super().__init__(logger, engine, git_provider, db_config)
@@ -135,14 +152,12 @@ class Database(DatabaseDriverBase):
         """
         Create a database driver instance based on the engine type.
         """
-        driver_class_name = engine.capitalize() + "Driver"
-        module            = sys.modules[__name__]
-        driver_class      = getattr(module, driver_class_name, None)
+        driver_class = _DRIVERS.get(engine.lower())
 
         if not driver_class:
             raise ValueError(f"Unsupported database engine: {engine}")
 
-        self.log.info(f"Using database driver: {driver_class_name}")
+        self.log.info(f"Using database driver: {driver_class.__name__}")
         return driver_class(logger, self.engine, self.git_provider, db_config)
 
 
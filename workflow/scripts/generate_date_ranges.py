@@ -1,40 +0,0 @@
-from datetime import datetime, timedelta
-
-def generate_date_ranges(start_date, end_date, interval):
-    """
-    Generate a list of date ranges based on the specified interval.
-
-    Parameters:
-    - start_date (datetime.date): The start date.
-    - end_date (datetime.date): The end date.
-    - interval (str): The interval for creating date ranges.
-                      'm' for month, 'w' for week, 'd' for day.
-
-    Returns:
-    - list: A list of tuples with start and end dates for each interval.
-    """
-
-    date_ranges = []
-    current_date = start_date
-
-    if interval == 'm':
-        while current_date <= end_date:
-            next_month = datetime(current_date.year + (current_date.month // 12), (current_date.month % 12) + 1, 1).date()
-            month_end = min(next_month - timedelta(days=1), end_date)
-            date_ranges.append([current_date, month_end])
-            current_date = next_month
-
-    elif interval == 'w':
-        while current_date <= end_date:
-            week_start = current_date - timedelta(days=current_date.weekday())
-            week_end = min(week_start + timedelta(days=6), end_date)
-            date_ranges.append([week_start, week_end])
-            current_date = week_end + timedelta(days=1)
-
-    elif interval == 'd':
-        while current_date <= end_date:
-            date_ranges.append([current_date, current_date])
-            current_date += timedelta(days=1)
-
-    return date_ranges
-
@@ -1,8 +1,18 @@
 """This module contains the GitAnalysis class to analyze Git repositories."""
+import re
+import sys
+import time
+import heapq
+import queue
 import logging
+import importlib
+import functools
+import threading
 import scripts.input_validator as input_validator
 import scripts.util as util
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from operator import itemgetter
 from pydriller import Repository
 from pydriller.metrics.process.change_set import ChangeSet
 from pydriller.metrics.process.code_churn import CodeChurn
@@ -14,6 +24,136 @@ from pydriller.metrics.process.lines_count import LinesCount
 
 validator = input_validator.Validator()
 
+_RE_SNAKEMAKE_RULE    = re.compile(r'(?m)^\s*rule\s+([A-Za-z_]\w*)\s*:')
+_RE_SNAKEMAKE_MODULE  = re.compile(r'(?m)^\s*module\s+([A-Za-z_]\w*)\s*:')
+# Group 1 is a quoted file name, group 2 any other (non-literal) include target.
+_RE_SNAKEMAKE_INCLUDE = re.compile(r'''(?m)^\s*include:[ \t]*(?:["']([^"']+)["']|(\S.*?))[ \t]*(?:#.*)?$''')
+
+_SEC_PER_DAY  = 86400.0
+_SEC_PER_HOUR = 3600.0
+_SEC_PER_MIN  = 60.0
+
+_COMMIT_CYCLE_FIELDS = itemgetter("committer_epoch",
+                                  "snakemake_n_rules_added", "snakemake_n_rules_removed",
+                                  "snakemake_n_modules_added", "snakemake_n_modules_removed")
+
+
+@functools.lru_cache(maxsize=65536)
+def _iso_with_tz(epoch=0, tz_offset=0):
+    """
+    Format an epoch time in the given UTC offset as "%Y-%m-%dT%H:%M:%S %z".
+    Commits created in batches share timestamps, so the result is cached.
+    """
+    t = time.gmtime(epoch + tz_offset)
+    sign = "-" if tz_offset < 0 else "+"
+    offset_hours, offset_mins = divmod(abs(tz_offset) // 60, 60)
+    return "%04d-%02d-%02dT%02d:%02d:%02d %s%02d%02d" % (
+        t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec,
+        sign, offset_hours, offset_mins)
+
+
+def _format_commit_date(date):
+    """
+    Format a timezone-aware commit date as "%Y-%m-%dT%H:%M:%S %z".
+    """
+    offset = date.utcoffset()
+    if offset is None:
+        return date.strftime("%Y-%m-%dT%H:%M:%S %z")
+    return _iso_with_tz(int(date.timestamp()), int(offset.total_seconds()))
+
+
+def _put_until_stopped(items_queue, item, stop_event):
+    """
+    Put an item into a bounded queue, giving up once the stop event is set.
+    Return True if the item was put.
+    """
+    while not stop_event.is_set():
+        try:
+            items_queue.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+
+    return False
+
+
+def _segment_evolution_cycles(epochs, rules_added, rules_removed, modules_added,
+                              modules_removed, snakemake_related):
+    """
+    Split commits sorted by epoch into evolution cycles. The arguments are
+    parallel sequences with one item per commit, so the loop does no dict lookups.
+    Return a list of (begin, end, n_commits, n_commits_snakemake_related,
+    n_rules_added, n_rules_removed, n_modules_added, n_modules_removed, members)
+    tuples, where begin and end are commit indices and members are the indices
+    of the commits whose file extensions belong to the cycle.
+    """
+    cycles = []
+    n = len(epochs)
+    if n < 2:
+        return cycles
+
+    begin = 0
+    n_commits = 1
+    n_commits_snakemake_related = 0
+    n_rules_added_on_the_day = 0
+    n_rules_removed_on_the_day = 0
+    n_modules_added_on_the_day = 0
+    n_modules_removed_on_the_day = 0
+    members = []
+    is_last_commit_of_the_day = False
+
+    for i in range(1, n):
+        n_commits += 1
+        if snakemake_related[i]:
+            n_commits_snakemake_related += 1
+
+        added_or_removed = (
+            rules_added[i] - rules_removed[i] or
+            modules_added[i] - modules_removed[i]
+        )
+        if not added_or_removed and not is_last_commit_of_the_day:
+            continue
+
+        if not epochs[begin] or not epochs[i]:
+            raise ValueError("Invalid epoch values for cycle begin and end.")
+
+        members.append(i)
+
+        # Check if the next commit is within 24 hours
+        if i + 1 < n and int((epochs[i + 1] - epochs[i]) / _SEC_PER_DAY) == 0:
+            n_rules_added_on_the_day += rules_added[i]
+            n_rules_removed_on_the_day += rules_removed[i]
+            n_modules_added_on_the_day += modules_added[i]
+            n_modules_removed_on_the_day += modules_removed[i]
+            is_last_commit_of_the_day = True
+            continue
+
+        cycles.append((
+            begin, i, n_commits, n_commits_snakemake_related,
+            rules_added[i] + n_rules_added_on_the_day,
+            rules_removed[i] + n_rules_removed_on_the_day,
+            modules_added[i] + n_modules_added_on_the_day,
+            modules_removed[i] + n_modules_removed_on_the_day,
+            members,
+        ))
+
+        begin = i
+        n_commits = 0
+        n_commits_snakemake_related = 0
+        n_rules_added_on_the_day = 0
+        n_rules_removed_on_the_day = 0
+        n_modules_added_on_the_day = 0
+        n_modules_removed_on_the_day = 0
+        members = []
+        is_last_commit_of_the_day = False
+
+    # Store leftover cycle; its rule and module counters are not carried over.
+    if begin != n - 1:
+        cycles.append((begin, n - 1, n_commits, n_commits_snakemake_related,
+                       0, 0, 0, 0, members))
+
+    return cycles
+
 
 class GitAnalysis:
     """
@@ -28,93 +168,146 @@ class GitAnalysis:
         self.count_authors = 0
         self.line_changes = dict()
         self.commits = dict()
+        self._git_repo = importlib.import_module("pygit2").Repository(self.repo_path)
 
 
-    def extract_commits(self, analysis_for=""):
+    def extract_commits(self, analysis_for="", include_branches=False):
         """
         Extract information from a given Git repository.
+        Listing the branches of each commit is expensive, so it is only done
+        for the snakemake analysis or when `include_branches` is True.
+        The commits are read from git on a separate thread while the main
+        thread processes the ones already read.
         """
         analysis_for = analysis_for.lower()
+        include_branches = include_branches or analysis_for == "snakemake"
+        commits_queue = queue.Queue(maxsize=16)
+        stop_event = threading.Event()
 
         try:
-            for commit in Repository(self.repo_path, num_workers=16).traverse_commits():
-                self.log.debug("Extracting a commit: %s", commit.hash)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                producer = executor.submit(self._prefetch_commits, commits_queue,
+                                           stop_event, include_branches)
+                try:
+                    while True:
+                        item = commits_queue.get()
+                        if item is None:
+                            break
+
+                        commit, commit_info, files = item
+                        self._process_commit(commit, commit_info, files, analysis_for)
+                finally:
+                    stop_event.set()
+
+                producer.result()
 
-                commit_info = {
-                    "msg"                  : commit.msg,
-                    "author"               : f"{commit.author.name}:{commit.author.email}",
-                    "committer"            : "%s:%s" % (commit.committer.name, commit.committer.email),
-                    "author_date"          : commit.author_date.strftime("%Y-%m-%dT%H:%M:%S %z"),
-                    "author_epoch"         : commit.author_date.timestamp(),
-                    "committer_date"       : commit.committer_date.strftime("%Y-%m-%dT%H:%M:%S %z"),
-                    "committer_epoch"      : commit.committer_date.timestamp(),
-                    "branches"             : list(commit.branches), # list
-                    "is_main_branch"       : commit.in_main_branch ,# bool
-                    "is_merge"             : commit.merge ,         # bool
-                    "parents"              : commit.parents ,       # list
-                    "files"                : [],
-                    "file_extensions"      : [],
-                    "change_types"         : [],
-                    "n_deletions"          : commit.deletions,
-                    "n_insertions"         : commit.insertions,
-                    "n_lines"              : commit.lines,
-                    "n_files"              : commit.files,
-                    "dmm_unit_size"        : commit.dmm_unit_size ,      # floaot
-                    "dmm_unit_complexity"  : commit.dmm_unit_complexity, # float
-                    "dmm_unit_interfacing" : commit.dmm_unit_interfacing # float
-                }
+        except Exception as e:
+            self.log.error("Error extracting git repo information: %s, line: %s", e, e.__traceback__.tb_lineno)
+            return 0
 
-                if analysis_for == "snakemake":
-                    commit_info = self._extend_commit_info_for_snakemake(commit_info)
-
-                for file in commit.modified_files:
-                    file_info = {
-                        "old_path": file.old_path,
-                        "new_path": file.new_path,
-                        "filename": file.filename,
-                        "change_type": file.change_type.name,
-                        "n_added_lines": file.added_lines,
-                        "n_deleted_lines": file.deleted_lines,
-                        #"methods": [vars(method) for method in file.methods],
-                        #"methods_before": [vars(method) for method in file.methods_before],
-                        #"changed_methods": [vars(method) for method in file.changed_methods],
-                        "n_lines": file.nloc,
-                        "complexity": file.complexity,
-                        "n_tokens": file.token_count
-                    }
+        self.count_commits = len(self.commits)
 
-                    file_extension = self._get_file_extensions(file.filename)
-                    if file_extension and file_extension not in commit_info["file_extensions"]:
-                        commit_info["file_extensions"].append(file_extension)
+        return self.count_commits
 
-                    if file.change_type.name not in commit_info["change_types"]:
-                        commit_info["change_types"].append(file.change_type.name)
 
-                    if analysis_for == "snakemake":
-                        file_info = self._initialize_file_info_for_snakemake(file_info)
-                        # TODO: Refactor this method since calculation is wrong
-                        commit_info, file_info = self._extract_commit_for_snakemake(commit_info, file_info, file)
+    def _prefetch_commits(self, commits_queue, stop_event, include_branches=False):
+        """
+        Read the commits and their modified files from git and put them into
+        the queue, followed by None when all commits are read.
+        """
+        try:
+            for commit in Repository(self.repo_path, num_workers=16).traverse_commits():
+                self.log.debug("Extracting a commit: %s", commit.hash)
+                commit_info, files = self._read_commit(commit, include_branches)
+                if not _put_until_stopped(commits_queue, (commit, commit_info, files), stop_event):
+                    return
+        finally:
+            _put_until_stopped(commits_queue, None, stop_event)
 
-                    commit_info["files"].append(file_info)
 
-                if analysis_for == "snakemake":
-                    # TODO: Refactor this method since calculation is wrong
-                    commit_info = self._post_process_commit_info_for_snakemake(commit_info)
+    def _read_commit(self, commit, include_branches=False):
+        """
+        Return the information of a commit and of its modified files that
+        pydriller has to read from git. Author and committer strings repeat
+        across commits, so they are interned to share one copy each.
+        """
+        commit_info = {
+            "msg"                  : commit.msg,
+            "author"               : sys.intern(f"{commit.author.name}:{commit.author.email}"),
+            "committer"            : sys.intern(f"{commit.committer.name}:{commit.committer.email}"),
+            "author_date"          : _format_commit_date(commit.author_date),
+            "author_epoch"         : commit.author_date.timestamp(),
+            "committer_date"       : _format_commit_date(commit.committer_date),
+            "committer_epoch"      : commit.committer_date.timestamp(),
+            "branches"             : list(commit.branches) if include_branches else None, # list
+            "is_main_branch"       : commit.in_main_branch ,# bool
+            "is_merge"             : commit.merge ,         # bool
+            "parents"              : commit.parents ,       # list
+            "files"                : [],
+            "file_extensions"      : [],
+            "change_types"         : [],
+            "n_deletions"          : commit.deletions,
+            "n_insertions"         : commit.insertions,
+            "n_lines"              : commit.lines,
+            "n_files"              : commit.files,
+            "dmm_unit_size"        : commit.dmm_unit_size ,      # floaot
+            "dmm_unit_complexity"  : commit.dmm_unit_complexity, # float
+            "dmm_unit_interfacing" : commit.dmm_unit_interfacing # float
+        }
 
-                if not self.date_first_commit or commit.committer_date < self.date_first_commit:
-                    self.date_first_commit = commit.committer_date
-                if not self.date_last_commit or commit.committer_date > self.date_last_commit:
-                    self.date_last_commit = commit.committer_date
+        files = []
+        for file in commit.modified_files:
+            file_info = {
+                "old_path": file.old_path,
+                "new_path": file.new_path,
+                "filename": file.filename,
+                "change_type": file.change_type.name,
+                "n_added_lines": file.added_lines,
+                "n_deleted_lines": file.deleted_lines,
+                #"methods": [vars(method) for method in file.methods],
+                #"methods_before": [vars(method) for method in file.methods_before],
+                #"changed_methods": [vars(method) for method in file.changed_methods],
+                "n_lines": file.nloc,
+                "complexity": file.complexity,
+                "n_tokens": file.token_count
+            }
+            files.append((file, file_info))
+
+        return commit_info, files
+
+
+    def _process_commit(self, commit, commit_info, files, analysis_for=""):
+        """
+        Add a commit read by _read_commit to the extracted commits.
+        """
+        if analysis_for == "snakemake":
+            commit_info = self._extend_commit_info_for_snakemake(commit_info)
 
-                self.commits[commit.hash] = commit_info
+        for file, file_info in files:
+            file_extension = self._get_file_extensions(file.filename)
+            if file_extension and file_extension not in commit_info["file_extensions"]:
+                commit_info["file_extensions"].append(file_extension)
 
-        except Exception as e:
-            self.log.error("Error extracting git repo information: %s, line: %s", e, e.__traceback__.tb_lineno)
-            return 0
+            if file.change_type.name not in commit_info["change_types"]:
+                commit_info["change_types"].append(file.change_type.name)
 
-        self.count_commits = len(self.commits)
+            if analysis_for == "snakemake":
+                file_info = self._initialize_file_info_for_snakemake(file_info)
+                # TODO: Refactor this method since calculation is wrong
+                commit_info, file_info = self._extract_commit_for_snakemake(commit_info, file_info, file, commit)
 
-        return self.count_commits
+            commit_info["files"].append(file_info)
+
+        if analysis_for == "snakemake":
+            # TODO: Refactor this method since calculation is wrong
+            commit_info = self._post_process_commit_info_for_snakemake(commit_info)
+
+        if not self.date_first_commit or commit.committer_date < self.date_first_commit:
+            self.date_first_commit = commit.committer_date
+        if not self.date_last_commit or commit.committer_date > self.date_last_commit:
+            self.date_last_commit = commit.committer_date
+
+        self.commits[commit.hash] = commit_info
 
 
     def _post_process_commit_info_for_snakemake(self, commit_info):
@@ -133,7 +326,23 @@ class GitAnalysis:
         return commit_info
 
 
-    def _extract_commit_for_snakemake(self, commit_info, file_info, file):
+    def _read_file_at_commit(self, commit_hash=None, path=None):
+        """
+        Return the content of a file at a given commit read directly from the
+        object database, or an empty string if the file does not exist there.
+        """
+        if not commit_hash or not path:
+            return ""
+
+        try:
+            blob = self._git_repo.revparse_single(commit_hash).tree[path]
+        except KeyError:
+            return ""
+
+        return blob.data.decode("utf-8", errors="ignore")
+
+
+    def _extract_commit_for_snakemake(self, commit_info, file_info, file, commit):
         is_snakemake_rule_file = (
             file.filename.lower() == "snakefile" or
             file.filename.lower().endswith(".smk") or
@@ -145,8 +354,14 @@ class GitAnalysis:
             file_info["snakemake_related"] = True
             commit_info["snakemake_related"] = True
             commit_info["snakemake_rule_files"].append(file.new_path)
-            source_code = file.source_code if file.source_code else ""
-            source_code_before = file.source_code_before if file.source_code_before else ""
+            source_code = ""
+            if file.change_type.name != "DELETE":
+                source_code = self._read_file_at_commit(commit.hash, file.new_path)
+
+            # An added file has no prior version, so skip looking it up.
+            source_code_before = ""
+            if file.change_type.name != "ADD" and commit.parents:
+                source_code_before = self._read_file_at_commit(commit.parents[0], file.old_path)
 
             commit_info["snakemake_irregular_rule_files"].extend(
                 self._get_snakemake_irregular_rule_files_from_code(source_code))
@@ -168,25 +383,11 @@ class GitAnalysis:
             commit_info["snakemake_modules_from_code"].extend(modules_from_code)
             commit_info["snakemake_modules_from_code_before"].extend(modules_from_code_before)
 
-            if rules_from_code:
-                for rule in rules_from_code:
-                    if rule not in rules_from_code_before:
-                        file_info["snakemake_n_rules_added"] += 1
-
-            if rules_from_code_before:
-                for rule in rules_from_code_before:
-                    if rule not in rules_from_code:
-                        file_info["snakemake_n_rules_removed"] += 1
-
-            if modules_from_code:
-                for module in modules_from_code:
-                    if module not in modules_from_code_before:
-                        file_info["snakemake_n_rules_added"] += 1
-
-            if modules_from_code_before:
-                for module in modules_from_code_before:
-                    if module not in modules_from_code:
-                        file_info["snakemake_n_rules_removed"] += 1
+            rules_now, rules_before = set(rules_from_code), set(rules_from_code_before)
+            modules_now, modules_before = set(modules_from_code), set(modules_from_code_before)
+            # Module changes are counted in the rule counters.
+            file_info["snakemake_n_rules_added"] += len(rules_now - rules_before) + len(modules_now - modules_before)
+            file_info["snakemake_n_rules_removed"] += len(rules_before - rules_now) + len(modules_before - modules_now)
 
         elif file.new_path:
             if file.new_path.lower().startswith("scripts/") or file.new_path.lower().startswith("workflow/scripts/"):
@@ -218,16 +419,10 @@ class GitAnalysis:
     def _get_snakemake_irregular_rule_files_from_code(self, code=""):
         """
         Return the list if there are included files having no .smk extension.
+        Includes of non-literal paths (variables, expressions) are irregular too.
         """
-        irregular_rule_files = []
-        for line in code.splitlines():
-            line = line.strip()
-            if line.startswith("include:"):
-                included_file = line.split(":")[1].strip().replace('"', '').replace("'", "")
-                if included_file and not included_file.endswith(".smk"):
-                    irregular_rule_files.append(included_file)
-
-        return irregular_rule_files
+        return [quoted or unquoted for quoted, unquoted in _RE_SNAKEMAKE_INCLUDE.findall(code)
+                if unquoted or not quoted.endswith(".smk")]
 
 
     def _initialize_file_info_for_snakemake(self, file_info):
@@ -247,15 +442,7 @@ class GitAnalysis:
         """
         Return the list if there are included files having .smk extension.
         """
-        included_files = []
-        for line in code.splitlines():
-            line = line.strip()
-            if line.startswith("include:"):
-                included_file = line.split(":")[1].strip().replace('"', '').replace("'", "")
-                if included_file and included_file.endswith(".smk"):
-                    included_files.append(included_file)
-
-        return included_files
+        return [quoted for quoted, _ in _RE_SNAKEMAKE_INCLUDE.findall(code) if quoted.endswith(".smk")]
 
 
     def _get_file_extensions(self, filename=""):
@@ -272,30 +459,14 @@ class GitAnalysis:
         """
         Return the list of Snakemake modules from the code.
         """
-        modules = list()
-        for line in code.splitlines():
-            # remove whitespaces and commit_parents
-            line = line.strip()
-            if line.startswith("module "):
-                module_name = (line.split()[1]).split(":")[0]
-                modules.append(module_name)
-
-        return modules
+        return _RE_SNAKEMAKE_MODULE.findall(code)
 
 
     def _get_snakemake_rule_names_from_code(self, code=""):
         """
         Return the list of Snakemake rules from the code.
         """
-        rules = list()
-        for line in code.splitlines():
-            # remove whitespaces and commit_parents
-            line = line.strip()
-            if line.startswith("rule "):
-                rule_name = (line.split()[1]).split(":")[0]
-                rules.append(rule_name)
-
-        return rules
+        return _RE_SNAKEMAKE_RULE.findall(code)
 
 
     def get_process_metrics(self, from_commit=None, to_commit=None, since=None, to=None):
@@ -385,162 +556,187 @@ class GitAnalysis:
         return process_metrics
 
 
-    def generate_event_logs_for_evolution_cycle(self, cycle_info, issues,
-                                                 comments, events, pullrequests,
-                                                 commits):
-
-        begin_epoch = cycle_info["begin"]["epoch"]
-        end_epoch   = cycle_info["end"]["epoch"]
-
-        event_logs = []
-        commits_preprocessed = []
-        commit_parents = {}
-        commits_hashes = []
-
+    def _iter_issue_events(self, issues, begin_epoch, end_epoch):
+        """
+        Yield (timestamp, event) pairs for issues created or closed in the cycle.
+        """
         for issue in issues:
-            created_at = util.str_to_datetime(date_str=issue["created_at"], fmt="%Y-%m-%dT%H:%M:%SZ")
-            if not created_at:
+            created_at = issue["created_at"]
+            created_at_epoch = util.utc_str_to_epoch(created_at)
+            if created_at_epoch is None:
                 self.log.warning("Issue %s has no created_at date", issue["number"])
                 continue
 
-            created_at_epoch = int(created_at.timestamp())
-            closed_at = None
+            closed_at = issue.get("closed_at")
             closed_at_epoch = None
-            if issue.get("closed_at"):
-                closed_at = util.str_to_datetime(date_str=issue["closed_at"], fmt="%Y-%m-%dT%H:%M:%SZ")
-
-                if not closed_at:
-                    self.log.warning("Issue %s has no closed_at date", issue["number"])
-                    continue
+            if closed_at:
+                closed_at_epoch = util.utc_str_to_epoch(closed_at)
 
-                closed_at_epoch = int(closed_at.timestamp())
-
-            if created_at_epoch >= begin_epoch and created_at_epoch <= end_epoch:
-                event_logs.append({
+            if begin_epoch <= created_at_epoch <= end_epoch:
+                yield created_at, {
                     "case_id": f"Issue-{issue['number']}",
                     "activity": "Issue Created",
-                    "timestamp": created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "timestamp": created_at,
                     "user": issue["user"]["login"]
-                })
+                }
 
-            if closed_at and closed_at_epoch >= begin_epoch and closed_at_epoch <= end_epoch:
-                event_logs.append({
+            if closed_at and begin_epoch <= closed_at_epoch <= end_epoch:
+                yield closed_at, {
                     "case_id": f"Issue-{issue['number']}",
                     "activity": "Issue Closed",
-                    "timestamp": closed_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "timestamp": closed_at,
                     "user": issue["user"]["login"],
-                })
+                }
+
 
+    def _iter_comment_events(self, comments, begin_epoch, end_epoch):
+        """
+        Yield (timestamp, event) pairs for issue comments created in the cycle.
+        """
         for comment in comments:
-            created_at = util.str_to_datetime(date_str=comment["created_at"], fmt="%Y-%m-%dT%H:%M:%SZ")
-            if not created_at:
+            created_at = comment["created_at"]
+            created_at_epoch = util.utc_str_to_epoch(created_at)
+            if created_at_epoch is None:
                 self.log.warning("Comment %s has no created_at date", comment["id"])
                 continue
 
-            created_at_epoch = int(created_at.timestamp())
-            if created_at_epoch >= begin_epoch and created_at_epoch <= end_epoch:
-                event_logs.append({
+            if begin_epoch <= created_at_epoch <= end_epoch:
+                yield created_at, {
                     "case_id": f"Issue-{comment['issue_url'].split('/')[-1]}",
                     "activity": "Issue Commented",
-                    "timestamp": created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "timestamp": created_at,
                     "user": comment["user"]["login"]
-                })
+                }
+
 
+    def _iter_event_events(self, events, begin_epoch, end_epoch):
+        """
+        Yield (timestamp, event) pairs for issue events created in the cycle.
+        """
         for event in events:
-            created_at = util.str_to_datetime(date_str=event["created_at"], fmt="%Y-%m-%dT%H:%M:%SZ")
-            if not created_at:
+            created_at = event["created_at"]
+            created_at_epoch = util.utc_str_to_epoch(created_at)
+            if created_at_epoch is None:
                 self.log.warning("Event %s has no created_at date", event["id"])
                 continue
 
-            created_at_epoch = int(created_at.timestamp())
-            if created_at_epoch >= begin_epoch and created_at_epoch <= end_epoch:
+            if begin_epoch <= created_at_epoch <= end_epoch:
                 user = None
                 if event["actor"] and "login" in event["actor"]:
                     user = event["actor"]["login"]
-                event_logs.append({
+                yield created_at, {
                     "case_id": f"Issue-{event['issue']['number']}",
                     "activity": event["event"],
-                    "timestamp": created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "timestamp": created_at,
                     "user": user
-                })
+                }
 
-        for commit_hash in sorted(commits, key=lambda k: commits[k]['committer_epoch']):
-            commit = commits[commit_hash]
-            if commit_hash in commits_preprocessed:
-                continue
-            committed_epoch = int(commit["committer_epoch"])
-            committed_at = util.epoch_to_str(epoch=committed_epoch)
 
-            commits_hashes.append(commit_hash)
+    def _iter_commit_events(self, commits_hashes, commits, begin_epoch, end_epoch, cycle_info):
+        """
+        Yield (timestamp, event) pairs for commits made in the cycle.
+        """
+        activity = "Committed"
+        if cycle_info["n_snakemake_rules_added"] > 0 or cycle_info["n_snakemake_modules_added"] > 0:
+            activity = "Committed-Snakemake"
 
-            if "parents" in commit:
-                if len(commit["parents"]) > 0:
-                    commit_parents[commit_hash] = commit["parents"]
+        for commit_hash in commits_hashes:
+            commit = commits[commit_hash]
+            committed_epoch = int(commit["committer_epoch"])
 
-            if committed_epoch >= begin_epoch and committed_epoch <= end_epoch:
-                activity = "Committed"
-                if cycle_info["n_snakemake_rules_added"] > 0 or cycle_info["n_snakemake_modules_added"] > 0:
-                    activity = "Committed-Snakemake"
-                event_logs.append({
+            if begin_epoch <= committed_epoch <= end_epoch:
+                committed_at = util.epoch_to_str(epoch=committed_epoch)
+                yield committed_at, {
                     "case_id": f"Commit-{commit_hash[:7]}",
                     "activity": activity,
                     "timestamp": committed_at,
                     "user": commit["committer"]
-                })
+                }
+
 
+    def _iter_pr_events(self, pullrequests, commits_hashes, commits, begin_epoch, end_epoch):
+        """
+        Yield (timestamp, event) pairs for pull requests opened in the cycle
+        and for the commits merged by them.
+        """
         for pr in pullrequests:
-            created_at = util.str_to_datetime(date_str=pr["created_at"], fmt="%Y-%m-%dT%H:%M:%SZ")
-            if not created_at:
+            created_at = pr["created_at"]
+            created_at_epoch = util.utc_str_to_epoch(created_at)
+            if created_at_epoch is None:
                 self.log.warning("Pull Request %s has no created_at date", pr["number"])
                 continue
-            created_at_epoch = int(created_at.timestamp())
 
-            if created_at_epoch >= begin_epoch and created_at_epoch <= end_epoch:
-                event_logs.append({
+            if begin_epoch <= created_at_epoch <= end_epoch:
+                yield created_at, {
                     "case_id": f"Issue-{pr['number']}",
                     "activity": "Pull Request Opened",
-                    "timestamp": created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "timestamp": created_at,
                     "user": pr["user"]["login"]
-                })
+                }
 
             # Find the corresponding commits
             merge_commit_sha = pr.get("merge_commit_sha")
-            if merge_commit_sha and merge_commit_sha in commit_parents:
-                parents = commit_parents[merge_commit_sha]
-                if len(parents) == 1:
-                    event_logs.append({
+            if not merge_commit_sha or merge_commit_sha not in commits:
+                continue
+
+            parents = commits[merge_commit_sha].get("parents")
+            if not parents:
+                continue
+
+            if len(parents) == 1:
+                timestamp = commits[parents[0]]["committer_date"]
+                yield timestamp, {
+                    "case_id": f"Issue-{pr['number']}",
+                    "activity": "Committed",
+                    "timestamp": timestamp,
+                    "user": pr["user"]["login"]
+                }
+            elif len(parents) == 2:
+                begin_commit = parents[0]
+                end_commit = parents[1]
+                begin_index = commits_hashes.index(begin_commit)
+                end_index = commits_hashes.index(end_commit)
+                # printlog(f"Merge commit {merge_commit_sha} has parents: begin - {begin_commit} ({begin_index}) and end - {end_commit} ({end_index})")
+
+                for i in range(begin_index, end_index):
+                    commit = commits_hashes[i]
+                    # printlog(f"Commit {commit} is a child of {begin_commit} and {end_commit}")
+                    try:
+                        timestamp = commits[commit]["committer_date"]
+                    except KeyError:
+                        self.log.warning("Commit %s not found in commits", commit)
+                        continue
+
+                    yield timestamp, {
                         "case_id": f"Issue-{pr['number']}",
                         "activity": "Committed",
-                        "timestamp": commits[parents[0]]["committer_date"],
+                        "timestamp": timestamp,
                         "user": pr["user"]["login"]
-                    })
-                    commits_preprocessed.append(parents[0])
-                elif len(parents) == 2:
-                    begin_commit = parents[0]
-                    end_commit = parents[1]
-                    begin_index = commits_hashes.index(begin_commit)
-                    end_index = commits_hashes.index(end_commit)
-                    # printlog(f"Merge commit {merge_commit_sha} has parents: begin - {begin_commit} ({begin_index}) and end - {end_commit} ({end_index})")
-
-                    child_commits = []
-                    for i in range(begin_index, end_index):
-                        child_commits.append(commits_hashes[i])
-
-                    for commit in child_commits:
-                        # printlog(f"Commit {commit} is a child of {begin_commit} and {end_commit}")
-                        try:
-                            event_logs.append({
-                                "case_id": f"Issue-{pr['number']}",
-                                "activity": "Committed",
-                                "timestamp": commits[commit]["committer_date"],
-                                "user": pr["user"]["login"]
-                            })
-                            commits_preprocessed.append(commit)
-                        except KeyError:
-                            self.log.warning("Commit %s not found in commits", commit)
-                            continue
-
-        return sorted(event_logs, key=lambda x: x["timestamp"])
+                    }
+
+
+    def generate_event_logs_for_evolution_cycle(self, cycle_info, issues,
+                                                 comments, events, pullrequests,
+                                                 commits):
+
+        begin_epoch = cycle_info["begin"]["epoch"]
+        end_epoch   = cycle_info["end"]["epoch"]
+
+        commits_hashes = sorted(commits, key=lambda k: commits[k]['committer_epoch'])
+
+        streams = [
+            self._iter_issue_events(issues, begin_epoch, end_epoch),
+            self._iter_comment_events(comments, begin_epoch, end_epoch),
+            self._iter_event_events(events, begin_epoch, end_epoch),
+            self._iter_commit_events(commits_hashes, commits, begin_epoch, end_epoch, cycle_info),
+            self._iter_pr_events(pullrequests, commits_hashes, commits, begin_epoch, end_epoch),
+        ]
+
+        # Each stream is mostly chronological already, so sorting it on its own
+        # is cheap and the sorted streams only need to be merged.
+        streams = [sorted(stream, key=itemgetter(0)) for stream in streams]
+
+        return [event for _, event in heapq.merge(*streams, key=itemgetter(0))]
 
 
     def extend_repo_info_general(self, repo_info=None, commits=None):
@@ -556,26 +752,32 @@ class GitAnalysis:
 
         authors = set()
         committers = set()
-        commit_hashes_sorted_by_epoch = sorted(commits, key=lambda k: commits[k]['committer_epoch'])
+        first_commit_at_epoch = None
+        last_commit_at_epoch = 0
+
+        # The order of the commits does not matter here, so no sorting is needed.
+        for commit in commits.values():
+            author = commit.get("author")
+            if author:
+                authors.add(author)
 
-        repo_info["first_commit_at_epoch"] = util.now(is_epoch=True)
-        repo_info["last_commit_at_epoch"] = 0
+            committer = commit.get("committer")
+            if committer:
+                committers.add(committer)
 
-        for commit_hash in commit_hashes_sorted_by_epoch:
-           commit = commits[commit_hash]
-           if "author" in commit:
-               authors.add(commit["author"])
+            committer_epoch = commit.get("committer_epoch")
+            if committer_epoch is not None:
+                if first_commit_at_epoch is None or committer_epoch < first_commit_at_epoch:
+                    first_commit_at_epoch = committer_epoch
 
-           if "committer" in commit:
-               committers.add(commit["committer"])
+                if committer_epoch > last_commit_at_epoch:
+                    last_commit_at_epoch = committer_epoch
 
-           if "committer_epoch" in commit:
-               committer_epoch  = commit["committer_epoch"]
-               if repo_info["first_commit_at_epoch"] > committer_epoch:
-                   repo_info["first_commit_at_epoch"] = committer_epoch
+        if first_commit_at_epoch is None:
+            first_commit_at_epoch = util.now(is_epoch=True)
 
-               if repo_info["last_commit_at_epoch"] < committer_epoch:
-                   repo_info["last_commit_at_epoch"] = committer_epoch
+        repo_info["first_commit_at_epoch"] = first_commit_at_epoch
+        repo_info["last_commit_at_epoch"] = last_commit_at_epoch
 
         repo_info["first_commit_at"] = util.epoch_to_str(
             epoch=repo_info["first_commit_at_epoch"],
@@ -600,144 +802,45 @@ class GitAnalysis:
         if not commits:
             raise ValueError("'commits' is required.")
 
-        repo_info["n_commits_snakemake_related"] = 0
-        repo_info["n_evolution_cycles"] = 0
-        repo_info["evolution_cycles"] = []
+        sorted_commits = sorted(commits.items(), key=lambda item: item[1]["committer_epoch"])
 
-        cycle_begin = {}
-        cycle_end = {}
-        cycle_n_commits = 0
-        cycle_n_commits_snakemake_related = 0
-        cycle_n_snakemake_rules_added = 0
-        cycle_n_snakemake_rules_removed = 0
-        cycle_n_snakemake_modules_added = 0
-        cycle_n_snakemake_modules_removed = 0
-        cycle_n_snakemake_rules_added_on_the_day = 0
-        cycle_n_snakemake_rules_removed_on_the_day = 0
-        cycle_n_snakemake_modules_added_on_the_day = 0
-        cycle_n_snakemake_modules_removed_on_the_day = 0
-        is_last_commit_of_the_day = False
+        # Turn the commit dicts into one column per field in a single pass.
+        epochs, rules_added, rules_removed, modules_added, modules_removed = zip(
+            *map(_COMMIT_CYCLE_FIELDS, (commit for _, commit in sorted_commits)))
+        snakemake_related = [bool(commit.get("snakemake_related")) for _, commit in sorted_commits]
+        cycles = _segment_evolution_cycles(epochs, rules_added, rules_removed, modules_added,
+                                           modules_removed, snakemake_related)
+
+        # extract_commits gives every commit a file_extensions list, so checking
+        # the first commit tells whether this history carries them at all.
+        has_file_extensions = "file_extensions" in sorted_commits[0][1]
+
+        repo_info["n_commits_snakemake_related"] = sum(snakemake_related)
+        repo_info["n_evolution_cycles"] = len(cycles)
+        repo_info["evolution_cycles"] = []
 
-        file_extensions = []
-        commit_hashes_sorted_by_epoch = sorted(commits, key=lambda k: commits[k]['committer_epoch'])
-        for i_commit, commit_hash in enumerate(commit_hashes_sorted_by_epoch):
-           commit = commits[commit_hash]
-
-           cycle_n_commits += 1
-           if "snakemake_related" in commit and commit["snakemake_related"]:
-               repo_info["n_commits_snakemake_related"] += 1
-
-           cycle_current = {
-               "hash": commit_hash,
-               "epoch": commit["committer_epoch"],
-           }
-
-           if cycle_begin == {}:
-               cycle_begin = cycle_current
-               if cycle_end == {}:
-                   cycle_n_commits = 1
-               else:
-                   cycle_n_commits = 0
-           else:
-               cycle_end = cycle_current
-               if "snakemake_related" in commit and commit["snakemake_related"]:
-                   cycle_n_commits_snakemake_related += 1
-
-               added_or_removed = (
-                   commit["snakemake_n_rules_added"] -
-                   commit["snakemake_n_rules_removed"] or
-                   commit["snakemake_n_modules_added"] -
-                   commit["snakemake_n_modules_removed"]
-               )
-
-               if added_or_removed or is_last_commit_of_the_day:
-                   diff_days = None
-                   diff_mins = None
-                   diff_hours = None
-                   begin_epoch = cycle_begin["epoch"]
-                   end_epoch   = cycle_end["epoch"]
-                   if begin_epoch and end_epoch:
-                       diff_days = util.convert_seconds(end_epoch - begin_epoch, unit="d")
-                       diff_mins = util.convert_seconds(end_epoch - begin_epoch, unit="m")
-                       diff_hours = util.convert_seconds(end_epoch - begin_epoch, unit="h")
-                   else:
-                       raise ValueError("Invalid epoch values for cycle begin and end.")
-
-                   # Check if the next commit is within 24 hours
-                   if i_commit + 1 < len(commits):
-                       next_commit_hash = commit_hashes_sorted_by_epoch[i_commit + 1]
-                       next_commit_epoch = commits[next_commit_hash]["committer_epoch"]
-                       next_diff_days = util.convert_seconds(next_commit_epoch - end_epoch, unit="d")
-                       if next_diff_days == 0:
-                           cycle_n_snakemake_rules_added_on_the_day += commit["snakemake_n_rules_added"]
-                           cycle_n_snakemake_rules_removed_on_the_day += commit["snakemake_n_rules_removed"]
-                           cycle_n_snakemake_modules_added_on_the_day += commit["snakemake_n_modules_added"]
-                           cycle_n_snakemake_modules_removed_on_the_day += commit["snakemake_n_modules_removed"]
-                           if "file_extensions" in commit:
-                               file_extensions += commit["file_extensions"]
-
-                           is_last_commit_of_the_day = True
-                           continue
-
-                   repo_info["n_evolution_cycles"] += 1
-                   cycle_n_snakemake_rules_added = commit["snakemake_n_rules_added"] + cycle_n_snakemake_rules_added_on_the_day
-                   cycle_n_snakemake_rules_removed = commit["snakemake_n_rules_removed"] + cycle_n_snakemake_rules_removed_on_the_day
-                   cycle_n_snakemake_modules_added = commit["snakemake_n_modules_added"] + cycle_n_snakemake_modules_added_on_the_day
-                   cycle_n_snakemake_modules_removed = commit["snakemake_n_modules_removed"] + cycle_n_snakemake_modules_removed_on_the_day
-                   if "file_extensions" in commit:
-                       file_extensions += commit["file_extensions"]
-
-                   repo_info["evolution_cycles"].append({
-                       "begin": cycle_begin,
-                       "end": cycle_end,
-                       "diff_days": diff_days,
-                       "diff_mins": diff_mins,
-                       "diff_hours": diff_hours,
-                       "n_commits": cycle_n_commits,
-                       "n_commits_snakemake_related": cycle_n_commits_snakemake_related,
-                       "n_snakemake_rules_added": cycle_n_snakemake_rules_added,
-                       "n_snakemake_rules_removed": cycle_n_snakemake_rules_removed,
-                       "n_snakemake_modules_added": cycle_n_snakemake_modules_added,
-                       "n_snakemake_modules_removed": cycle_n_snakemake_modules_removed,
-                       "file_extensions": list(set(file_extensions)),
-                   })
-
-                   cycle_begin = cycle_end
-                   cycle_n_commits_snakemake_related = 0
-                   cycle_n_commits = 0
-                   cycle_n_snakemake_rules_added = 0
-                   cycle_n_snakemake_rules_removed = 0
-                   cycle_n_snakemake_modules_added = 0
-                   cycle_n_snakemake_modules_removed = 0
-                   cycle_n_snakemake_rules_added_on_the_day = 0
-                   cycle_n_snakemake_rules_removed_on_the_day = 0
-                   cycle_n_snakemake_modules_added_on_the_day = 0
-                   cycle_n_snakemake_modules_removed_on_the_day = 0
-                   is_last_commit_of_the_day = False
-                   file_extensions = []
-
-        # Store leftover cycle
-        if cycle_begin != {} and cycle_end != {} and cycle_begin != cycle_end:
-            repo_info["n_evolution_cycles"] += 1
-            begin_epoch = cycle_begin["epoch"]
-            end_epoch   = cycle_end["epoch"]
-            diff_days = util.convert_seconds(end_epoch - begin_epoch, unit="d")
-            diff_mins = util.convert_seconds(end_epoch - begin_epoch, unit="m")
-            diff_hours = util.convert_seconds(end_epoch - begin_epoch, unit="h")
+        for (begin, end, n_commits, n_commits_snakemake_related,
+             n_rules_added, n_rules_removed, n_modules_added, n_modules_removed,
+             members) in cycles:
+            file_extensions = set()
+            if has_file_extensions:
+                for i in members:
+                    file_extensions.update(sorted_commits[i][1]["file_extensions"])
 
+            diff_secs = epochs[end] - epochs[begin]
             repo_info["evolution_cycles"].append({
-                "begin": cycle_begin,
-                "end": cycle_end,
-                "diff_days": diff_days,
-                "diff_mins": diff_mins,
-                "diff_hours": diff_hours,
-                "n_commits": cycle_n_commits,
-                "n_commits_snakemake_related": cycle_n_commits_snakemake_related,
-                "n_snakemake_rules_added": cycle_n_snakemake_rules_added,
-                "n_snakemake_rules_removed": cycle_n_snakemake_rules_removed,
-                "n_snakemake_modules_added": cycle_n_snakemake_modules_added,
-                "n_snakemake_modules_removed": cycle_n_snakemake_modules_removed,
-                "file_extensions": list(set(file_extensions)),
+                "begin": {"hash": sorted_commits[begin][0], "epoch": epochs[begin]},
+                "end": {"hash": sorted_commits[end][0], "epoch": epochs[end]},
+                "diff_days": int(diff_secs / _SEC_PER_DAY),
+                "diff_mins": int(diff_secs / _SEC_PER_MIN),
+                "diff_hours": int(diff_secs / _SEC_PER_HOUR),
+                "n_commits": n_commits,
+                "n_commits_snakemake_related": n_commits_snakemake_related,
+                "n_snakemake_rules_added": n_rules_added,
+                "n_snakemake_rules_removed": n_rules_removed,
+                "n_snakemake_modules_added": n_modules_added,
+                "n_snakemake_modules_removed": n_modules_removed,
+                "file_extensions": list(file_extensions),
             })
 
         return repo_info
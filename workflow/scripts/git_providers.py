@@ -2,26 +2,118 @@
 like GitHub, GitLab, etc."""
 
 import os
-import re
-import sys
+import json
+import math
 import time
+import shelve
+import random
+import shutil
 import logging
 import importlib
+import threading
 import scripts.input_validator as input_validator
-from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_tz, mktime_tz
+from urllib.parse import urlencode, urlparse, parse_qs
 from abc import ABC, abstractmethod
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 validator = input_validator.Validator()
 
+# Default logger of the classes in this module.
+_LOG = logging.getLogger(__name__)
+
+# orjson decodes large API responses several times faster than the stdlib.
+# Both accept the raw response bytes.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Clone errors that retrying cannot fix, matched against the lowercased
+# message of the exception raised by pygit2.
+_PERMANENT_CLONE_ERRORS = (
+    "status code: 401",
+    "status code: 403",
+    "status code: 404",
+    "authentication required",
+    "authentication replays",
+    "repository not found",
+)
+
+# Upper bound of the backoff between clone attempts, in seconds.
+_CLONE_BACKOFF_CAP = 600
+
+
+def _is_permanent_clone_error(error):
+    """
+    Return True if a clone error will not go away by retrying.
+    """
+    message = str(error).lower()
+    return any(pattern in message for pattern in _PERMANENT_CLONE_ERRORS)
+
+
+# Provider classes by provider name, filled in by the register_provider decorator.
+_PROVIDERS = {}
+
+
+def register_provider(name):
+    """
+    Register a provider class under the given provider name.
+    """
+    def decorator(provider_class):
+        _PROVIDERS[name.lower()] = provider_class
+        return provider_class
+    return decorator
+
+
+def _parse_links(link_header):
+    """
+    Parse a Link header into links by relation, as requests.Response.links does.
+    """
+    if not link_header:
+        return {}
+
+    return {link.get("rel") or link.get("url"): link
+            for link in requests.utils.parse_header_links(link_header)}
+
+
+class _Pacer:
+    """
+    Space out the requests of all threads by a minimum interval, which is never
+    shorter than the configured floor interval.
+    """
+    def __init__(self, floor_interval=0.0):
+        self.floor_interval = floor_interval
+        self.min_interval  = 0.0
+        self._next_allowed = 0.0
+        self._lock         = threading.Lock()
+
+
+    def acquire(self):
+        """
+        Wait until the next request is allowed and reserve the slot after it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait_secs = self._next_allowed - now
+            interval = max(self.min_interval, self.floor_interval)
+            self._next_allowed = max(now, self._next_allowed) + interval
+
+        if wait_secs > 0:
+            time.sleep(wait_secs)
+
 
 class GitProviderBase(ABC):
     """
     Abstract base class for Git providers.
     """
-    def __init__(self, logger=logging.getLogger(), provider=None, token=None,
-                 checkout=False, interval_apicall=1, interval_clone=60,
-                 http_timeout=10):
+    def __init__(self, logger=_LOG, provider=None, token=None,
+                 checkout=False, interval_apicall=0, interval_clone=60,
+                 http_timeout=10, clone_depth=0, clone_bare=False,
+                 etag_cache_file=None):
         self.log = logger
         self.api_token      = token
         self.provider       = provider
@@ -30,6 +122,9 @@ class GitProviderBase(ABC):
         self.per_page       = 100
         self.interval_apicall = interval_apicall
         self.interval_clone   = interval_clone
+        self.clone_depth      = clone_depth
+        self.clone_bare       = clone_bare
+        self.etag_cache_file  = etag_cache_file
 
 
     @abstractmethod
@@ -40,7 +135,7 @@ class GitProviderBase(ABC):
 
 
     @abstractmethod
-    def call_api_repository(self, owner, repo) -> list:
+    def call_api_repository(self, owner, repo) -> dict:
         """
         Abstract method to get the repository details.
         """
@@ -54,12 +149,19 @@ class GitProviderBase(ABC):
 
 
     @abstractmethod
-    def call_api_pull_request(self, owner, repo, issue_no) -> list:
+    def call_api_pull_request(self, owner, repo, issue_no) -> dict:
         """
         Abstract method to get the pull request details of an issue.
         """
 
 
+    @abstractmethod
+    def call_api_pull_requests(self, owner, repo) -> list:
+        """
+        Abstract method to get all pull requests of a repository.
+        """
+
+
     @abstractmethod
     def call_api_issue_comments(self, owner, repo, issue_no) -> list:
         """
@@ -74,6 +176,20 @@ class GitProviderBase(ABC):
         """
 
 
+    @abstractmethod
+    def call_api_repository_issue_comments(self, owner, repo) -> list:
+        """
+        Abstract method to get the comments of all issues of a repository.
+        """
+
+
+    @abstractmethod
+    def call_api_repository_issue_events(self, owner, repo) -> list:
+        """
+        Abstract method to get the events of all issues of a repository.
+        """
+
+
     @abstractmethod
     def call_api_commit_comments(self, owner, repo) -> list:
         """
@@ -123,16 +239,25 @@ class GitProviderBase(ABC):
         """
 
 
+    def close(self) -> None:
+        """
+        Release the connections held by the provider. Nothing to release by default.
+        """
+
+
 class GitProvider(GitProviderBase):
     """
     GitProvider class to interact with various Git services using the provider.
     """
-    def __init__(self, logger=logging.getLogger(), provider=None, token=None,
-                 checkout=False, interval_apicall=1, interval_clone=10,
-                 http_timeout=10):
+    def __init__(self, logger=_LOG, provider=None, token=None,
+                 checkout=False, interval_apicall=0, interval_clone=10,
+                 http_timeout=10, clone_depth=0, clone_bare=False,
+                 etag_cache_file=None):
         super().__init__(logger=logger, provider=provider, token=token,
                          checkout=checkout, interval_apicall=interval_apicall,
-                         interval_clone=interval_clone, http_timeout=http_timeout)
+                         interval_clone=interval_clone, http_timeout=http_timeout,
+                         clone_depth=clone_depth, clone_bare=clone_bare,
+                         etag_cache_file=etag_cache_file)
         if not self.api_token:
             raise ValueError("API token is required for Git provider")
 
@@ -146,17 +271,19 @@ class GitProvider(GitProviderBase):
         if not self.provider:
             raise ValueError("Git provider is required")
 
-        provider_class_name = self.provider.capitalize() + "Provider"
-        module = sys.modules[__name__]
-        provider_class = getattr(module, provider_class_name, None)
+        provider_class = _PROVIDERS.get(self.provider.lower())
 
         if not provider_class:
-            raise ValueError(f"Unsupported Git provider: {self.provider}")
+            raise ValueError(f"Unsupported Git provider: {self.provider} "
+                             f"(supported: {', '.join(sorted(_PROVIDERS))})")
 
-        self.log.debug(f"provider class name: {provider_class_name}")
+        self.log.debug(f"provider class name: {provider_class.__name__}")
         return provider_class(self.log, self.provider, self.api_token,
                               self.checkout, self.interval_apicall,
-                              self.interval_clone, self.http_timeout)
+                              self.interval_clone, self.http_timeout,
+                              clone_depth=self.clone_depth,
+                              clone_bare=self.clone_bare,
+                              etag_cache_file=self.etag_cache_file)
 
 
     def search_repositories(self, query):
@@ -187,6 +314,13 @@ class GitProvider(GitProviderBase):
         return self._provider_instance.call_api_pull_request(owner, repo, issue_no)
 
 
+    def call_api_pull_requests(self, owner, repo):
+        """
+        Call API to get all pull requests of a repository.
+        """
+        return self._provider_instance.call_api_pull_requests(owner, repo)
+
+
     def call_api_issue_comments(self, owner, repo, issue_no):
         """
         Call API to get the comments of an issue.
@@ -201,6 +335,20 @@ class GitProvider(GitProviderBase):
         return self._provider_instance.call_api_issue_events(owner, repo, issue_no)
 
 
+    def call_api_repository_issue_comments(self, owner, repo):
+        """
+        Call API to get the comments of all issues of a repository.
+        """
+        return self._provider_instance.call_api_repository_issue_comments(owner, repo)
+
+
+    def call_api_repository_issue_events(self, owner, repo):
+        """
+        Call API to get the events of all issues of a repository.
+        """
+        return self._provider_instance.call_api_repository_issue_events(owner, repo)
+
+
     def call_api_commit_comments(self, owner, repo):
         """
         Call API to get the commit comments of a repository.
@@ -250,22 +398,61 @@ class GitProvider(GitProviderBase):
         return self._provider_instance.clone_repository(clone_dir, owner, repo_name, retry_count)
 
 
+    def close(self) -> None:
+        """
+        Release the connections held by the provider.
+        """
+        self._provider_instance.close()
+
+
+@register_provider("github")
 class GithubProvider(GitProviderBase):
     """
     Git provider for GitHub.
     """
-    def __init__(self, logger=logging.getLogger(), provider=None, token=None,
-                 checkout=False, interval_apicall=1, interval_clone=10,
-                 http_timeout=10):
+    def __init__(self, logger=_LOG, provider=None, token=None,
+                 checkout=False, interval_apicall=0, interval_clone=10,
+                 http_timeout=10, clone_depth=0, clone_bare=False,
+                 etag_cache_file=None):
         super().__init__(logger=logger, provider=provider, token=token,
                          checkout=checkout, interval_apicall=interval_apicall,
-                         interval_clone=interval_clone, http_timeout=http_timeout)
+                         interval_clone=interval_clone, http_timeout=http_timeout,
+                         clone_depth=clone_depth, clone_bare=clone_bare,
+                         etag_cache_file=etag_cache_file)
         self.base_url_api   = "https://api.github.com"
         self.base_url_clone = "https://github.com"
         self.http_headers = {
-            "Accept": "application/json",
-            "Authorization": f"token {self.api_token}"
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
         }
+        if self.api_token:
+            self.http_headers["Authorization"] = f"Bearer {self.api_token}"
+        self.max_workers = 8
+        self.max_retries = 3
+
+        # Keep the connections alive across all API calls and threads, and let
+        # the adapter retry transient server errors. Rate limiting (403/429) is
+        # handled by _get, and the final error response is returned to it.
+        # Threads wait for a pooled connection instead of opening extra ones
+        # that would be discarded after a single request.
+        retries = Retry(total=self.max_retries, backoff_factor=1.5,
+                        status_forcelist=[502, 503, 504], raise_on_status=False,
+                        respect_retry_after_header=True)
+        # The headers are set once on the session and merged into every request.
+        self._session = requests.Session()
+        self._session.headers.update(self.http_headers)
+        self._session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                                                    pool_block=True, max_retries=retries))
+        # Calls are paced by the X-RateLimit budget. interval_apicall is an
+        # optional floor shared by all threads, off (0) by default, since any
+        # fixed interval caps the throughput of all workers together.
+        self._pacer = _Pacer(floor_interval=self.interval_apicall)
+        self._clock_skew = None
+
+        # Responses kept by ETag across runs. GitHub answers a matching
+        # If-None-Match with 304, which does not count against the rate limit.
+        self._etag_cache = shelve.open(self.etag_cache_file) if self.etag_cache_file else None
+        self._etag_lock  = threading.Lock()
 
         self.log.debug("GitHubProvider initializing...: base_url_api: %s",
                        self.base_url_api)
@@ -273,9 +460,8 @@ class GithubProvider(GitProviderBase):
 
     def _check_rate_limit(self, response_headers=None):
         if not response_headers:
-            ratelimit_result = requests.get(
+            ratelimit_result = self._session.get(
                 f"{self.base_url_api}/rate_limit",
-                headers=self.http_headers,
                 timeout=self.http_timeout)
 
             if ratelimit_result.status_code != 200:
@@ -287,211 +473,388 @@ class GithubProvider(GitProviderBase):
         if not response_headers:
             raise ValueError("Response headers are required to check rate limit")
 
-        limit = response_headers.get("X-RateLimit-Limit") or 0
-        remaining = response_headers.get("X-RateLimit-Remaining") or 0
-        epoch_reset = response_headers.get("X-RateLimit-Reset") or 0
-        server_time = response_headers.get("Date") or ""
-        epoch_now = int(parsedate_to_datetime(server_time).timestamp())
-        reset_in_secs = int(epoch_reset) - int(epoch_now)
-
-        self.log.debug("Rate limits: %d/%d, Reset in %d seconds", int(remaining),
-                       int(limit), reset_in_secs)
+        limit = int(response_headers.get("X-RateLimit-Limit") or 0)
+        remaining = int(response_headers.get("X-RateLimit-Remaining") or 0)
+        epoch_reset = int(response_headers.get("X-RateLimit-Reset") or 0)
+        reset_in_secs = max(epoch_reset - int(self._server_now(response_headers)), 0)
 
-        time.sleep(self.interval_apicall)
+        self.log.debug("Rate limits: %d/%d, Reset in %d seconds", remaining,
+                       limit, reset_in_secs)
 
-        if int(remaining) < 2:
+        if remaining < 2:
             self.log.info("Rate limit exceeded. Waiting for %d seconds.",
                           reset_in_secs)
             time.sleep(reset_in_secs)
+            self._pacer.min_interval = 0.0
+        elif remaining < reset_in_secs:
+            # Less than one call per second is left until the reset, so spread
+            # the remaining calls of all threads evenly instead of running into
+            # the limit. Calls are not delayed while the budget is healthy.
+            self._pacer.min_interval = reset_in_secs / remaining
+        else:
+            self._pacer.min_interval = 0.0
 
 
-    def _call_api(self, api_url, pager=False, page=1, next_link=False):
-        items = []
-        total_count = 0
-        found_next_link = False
+    def _server_now(self, response_headers):
+        """
+        Return the current epoch time on the server clock. The skew between the
+        server and local clocks is measured from the Date header of the first
+        response and reused afterwards, so the header is parsed only once.
+        """
+        if self._clock_skew is None:
+            server_time = response_headers.get("Date")
+            if not server_time:
+                return time.time()
+            self._clock_skew = mktime_tz(parsedate_tz(server_time)) - time.time()
 
-        while True:
-            if pager and found_next_link == False:
-                api_url += f"&page={page}&per_page={self.per_page}"
+        return time.time() + self._clock_skew
 
-            self.log.debug("Calling API (pager=%s, page=%d, next_link=%s): %s",
-                           pager, page, next_link, api_url)
 
-            response = requests.get(
+    def _get_retry_wait(self, response, try_count):
+        """
+        Return the seconds to wait before retrying a rate limited request, or
+        None if the response was not caused by rate limiting.
+        """
+        response_headers = response.headers
+        retry_after = response_headers.get("Retry-After")
+        if retry_after:
+            return int(retry_after)
+
+        if response_headers.get("X-RateLimit-Remaining") == "0":
+            epoch_reset = int(response_headers.get("X-RateLimit-Reset") or 0)
+            return max(epoch_reset - int(self._server_now(response_headers)), 1)
+
+        # Secondary rate limits may come without either header, in which case
+        # GitHub asks to wait at least a minute and back off exponentially.
+        if response.status_code == 429 or "rate limit" in response.text.lower():
+            return 60 * 2 ** try_count
+
+        return None
+
+
+    def _get(self, api_url, params=None):
+        """
+        Send a GET request to the API, waiting and retrying while rate limited.
+        If the ETag cache is enabled, unchanged responses are served from it.
+        :return: The response body and the links parsed from its Link header.
+        """
+        cache_key = None
+        cached = None
+        headers = None
+        if self._etag_cache is not None:
+            cache_key = f"{api_url}?{urlencode(params)}" if params else api_url
+            with self._etag_lock:
+                cached = self._etag_cache.get(cache_key)
+            if cached:
+                headers = {"If-None-Match": cached["etag"]}
+
+        for try_count in range(self.max_retries + 1):
+            self._pacer.acquire()
+            response = self._session.get(
                 api_url,
-                headers=self.http_headers,
+                params=params,
+                headers=headers,
                 timeout=self.http_timeout)
 
-            if response.status_code != 200:
-                error_message = f"Failed to call API: {api_url}: {response.text}"
-                raise requests.exceptions.HTTPError(error_message)
+            if response.status_code not in (403, 429) or try_count == self.max_retries:
+                break
 
-            if not response:
-                raise ValueError("No response from API: %s", api_url)
+            wait_secs = self._get_retry_wait(response, try_count)
+            if wait_secs is None:
+                break
 
-            self._check_rate_limit(response.headers)
+            self.log.info("Rate limited on %s. Retrying after %d seconds. (%d/%d)",
+                          api_url, wait_secs, try_count + 1, self.max_retries)
+            time.sleep(wait_secs)
 
-            item = response.json()
-            if type(item) is not list:
-                item = [item]
+        if response.status_code == 304 and cached:
+            self.log.debug("Not modified, using the cached response: %s", cache_key)
+            content = cached["content"]
+            links = _parse_links(cached["link"])
+        elif response.status_code != 200:
+            error_message = f"Failed to call API: {api_url}: {response.text}"
+            raise requests.exceptions.HTTPError(error_message)
+        else:
+            content = response.content
+            links = response.links
+            if cache_key and response.headers.get("ETag"):
+                with self._etag_lock:
+                    self._etag_cache[cache_key] = {
+                        "etag": response.headers["ETag"],
+                        "content": content,
+                        "link": response.headers.get("Link"),
+                    }
 
-            count_items = len(item)
-            items.extend(item)
+        # A 304 still carries the current rate limit headers.
+        self._check_rate_limit(response.headers)
+
+        return content, links
+
+
+    def _json_items(self, content):
+        """
+        Decode a JSON response body once and return it as a list of items.
+        """
+        item = _json_loads(content)
+        if not isinstance(item, list):
+            item = [item]
+        return item
+
+
+    def _fetch_page(self, api_url, page, params=None):
+        """
+        Return the items on a page of a paginated API.
+        """
+        page_params = {**(params or {}), "page": page, "per_page": self.per_page}
+        content, _ = self._get(api_url, params=page_params)
+        item = self._json_items(content)
+
+        self.log.debug("Retrieved %d items on the page %d from API: %s",
+                       len(item), page, api_url)
+        return item
+
+
+    def _call_api_one(self, api_url, params=None):
+        """
+        Call an API that returns a single object and return the decoded object.
+        """
+        self.log.debug("Calling API: %s", api_url)
+        content, _ = self._get(api_url, params=params)
+        return _json_loads(content)
+
+
+    def _get_last_page(self, links):
+        """
+        Return the page number of the "last" link of a response, or None if
+        the response has no such link.
+        """
+        last_url = links.get("last", {}).get("url")
+        if not last_url:
+            return None
+
+        last_page = parse_qs(urlparse(last_url).query).get("page")
+        return int(last_page[0]) if last_page else None
+
+
+    def _call_api_pages(self, api_url, page=1, params=None):
+        """
+        Fetch all pages of a paginated API. If the first page is full and links
+        to the last page, all remaining pages are requested concurrently at once.
+        Otherwise they are requested in batches that double in size (up to
+        max_workers) until a page is not full.
+        """
+        content, links = self._get(api_url, params={**(params or {}), "page": page, "per_page": self.per_page})
+        items = self._json_items(content)
+        self.log.debug("Retrieved %d items on the page %d from API: %s",
+                       len(items), page, api_url)
+        if len(items) < self.per_page:
+            return items
 
-            current_count   = count_items
-            old_total_count = total_count
-            total_count     = old_total_count + current_count
+        last_page = self._get_last_page(links)
+        if last_page:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                pages = range(page + 1, last_page + 1)
+                for result in executor.map(lambda p: self._fetch_page(api_url, p, params), pages):
+                    items.extend(result)
 
-            self.log.debug("Retrieved %d+%d=%d items on the page %d from API: %s",
-                           current_count, old_total_count, total_count,
-                           page, api_url)
+            self.log.debug("Retrieved %d items in total from API: %s", len(items), api_url)
+            return items
 
-            if count_items < self.per_page or not pager:
+        next_page = page + 1
+        batch_size = 1
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                pages = range(next_page, next_page + batch_size)
+                results = executor.map(lambda p: self._fetch_page(api_url, p, params), pages)
+                for result in results:
+                    items.extend(result)
+                    if len(result) < self.per_page:
+                        self.log.debug("Retrieved %d items in total from API: %s",
+                                       len(items), api_url)
+                        return items
+
+                next_page += batch_size
+                batch_size = min(batch_size * 2, self.max_workers)
+
+
+    def _call_api_next_links(self, api_url, page=1, params=None):
+        """
+        Fetch all pages of a paginated API by following the "next" links.
+        """
+        items = []
+        params = {**(params or {}), "page": page, "per_page": self.per_page}
+
+        while True:
+            self.log.debug("Calling API (next_link=True): %s", api_url)
+            content, links = self._get(api_url, params=params)
+
+            item = self._json_items(content)
+            n_items = len(item)
+            items.extend(item)
+            self.log.debug("Retrieved %d+%d=%d items from API: %s",
+                           n_items, len(items) - n_items, len(items), api_url)
+
+            if n_items < self.per_page:
                 break
 
-            page += 1
-
-            if next_link:
-                next_link_pattern = r'(?<=<)([\S]*)(?=>; rel="Next")'
-                link_header = response.headers.get("Link")
-                next_link = None
-                if link_header:
-                    next_link = re.search(next_link_pattern, link_header, re.IGNORECASE)
-                if next_link:
-                    found_next_link = True
-                    api_url = next_link.group(0)
-                    continue
+            # requests parses the Link header, so no pattern matching is needed.
+            next_url = links.get("next", {}).get("url")
+            if not next_url:
                 break
 
-        self.log.debug("items: %s", items)
+            # The next link already contains the paging parameters.
+            api_url = next_url
+            params = None
+
         return items
 
 
     def call_api_repository(self, owner, repo):
         api_url = f"{self.base_url_api}/repos/{owner}/{repo}"
-        return self._call_api(api_url)
+        return self._call_api_one(api_url)
 
 
     def call_api_issues(self, owner, repo):
-        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/issues?state=all"
-        return self._call_api(api_url, pager=True, page=1, next_link=True)
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/issues"
+        return self._call_api_next_links(api_url, params={"state": "all"})
 
 
     def call_api_pull_request(self, owner, repo, issue_no):
         api_url = f"{self.base_url_api}/repos/{owner}/{repo}/pulls/{issue_no}"
-        return self._call_api(api_url)
+        return self._call_api_one(api_url)
+
+
+    def call_api_pull_requests(self, owner, repo):
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/pulls"
+        return self._call_api_pages(api_url, params={"state": "all"})
 
 
     def call_api_issue_comments(self, owner, repo, issue_no):
-        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/issues/{issue_no}/comments?per_page=100"
-        return self._call_api(api_url, pager=True, page=1, next_link=False)
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/issues/{issue_no}/comments"
+        return self._call_api_pages(api_url)
 
 
     def call_api_issue_events(self, owner, repo, issue_no):
-        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/issues/{issue_no}/events?per_page=100"
-        return self._call_api(api_url, pager=True, page=1, next_link=False)
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/issues/{issue_no}/events"
+        return self._call_api_pages(api_url)
+
+
+    def call_api_repository_issue_comments(self, owner, repo):
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/issues/comments"
+        return self._call_api_pages(api_url)
+
+
+    def call_api_repository_issue_events(self, owner, repo):
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/issues/events"
+        return self._call_api_pages(api_url)
 
 
     def call_api_commit_comments(self, owner, repo):
-        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/comments?per_page=100"
-        return self._call_api(api_url, pager=True, page=1, next_link=False)
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/comments"
+        return self._call_api_pages(api_url)
 
 
     def call_api_cicd_artifacts(self, owner, repo):
-        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/actions/artifacts?per_page=100"
-        response = self._call_api(api_url, pager=True, page=1, next_link=False)
-        try:
-            return response[0]["artifacts"]
-        except KeyError:
-            return []
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/actions/artifacts"
+        response = self._call_api_one(api_url, params={"per_page": self.per_page})
+        return response.get("artifacts", [])
 
 
     def call_api_cicd_workflows(self, owner, repo):
-        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/actions/workflows?per_page=100"
-        response = self._call_api(api_url, pager=True, page=1, next_link=False)
-        try:
-            return response[0]["workflows"]
-        except KeyError:
-            return []
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/actions/workflows"
+        response = self._call_api_one(api_url, params={"per_page": self.per_page})
+        return response.get("workflows", [])
 
 
     def call_api_cicd_workflow_runs(self, owner, repo):
-        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/actions/runs?per_page=100"
-        response = self._call_api(api_url, pager=True, page=1, next_link=False)
-        try:
-            return response[0]["workflow_runs"]
-        except KeyError:
-            return []
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/actions/runs"
+        response = self._call_api_one(api_url, params={"per_page": self.per_page})
+        return response.get("workflow_runs", [])
 
 
     def call_api_pages(self, owner, repo):
-        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/pages/builds?per_page=100"
-        return self._call_api(api_url, pager=True, page=1, next_link=False)
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/pages/builds"
+        return self._call_api_pages(api_url)
 
 
     def call_api_releases(self, owner, repo):
-        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/releases?per_page=100"
-        return self._call_api(api_url, pager=True, page=1, next_link=False)
+        api_url = f"{self.base_url_api}/repos/{owner}/{repo}/releases"
+        return self._call_api_pages(api_url)
 
 
-    def search_repositories(self, query=None):
-        self.log.info(f"Searching GitHub repositories with query: {query}")
-        items         = []
-        total_count   = 0
-        current_page  = 1
-        current_count = 0
-
-        while True:
-            request_url = f"{self.base_url_api}/search/repositories?q={query}&per_page=100&page={current_page}"
-            search_results = requests.get(
-                request_url,
-                headers=self.http_headers,
-                timeout=10)
-
-            if search_results.status_code != 200:
-                error_message = f"Failed to search repositories: {request_url}: {search_results.text}"
-                raise requests.exceptions.HTTPError(error_message)
-
-            response_headers  = search_results.headers
-            search_results    = search_results.json()
-            total_count       = search_results['total_count']
-            total_pages       = int(total_count / 100) + 1
-            current_count    += len(search_results['items'])
-
-            items.extend(search_results['items'])
+    def _search_page(self, query, page):
+        """
+        Return a page of the repository search results.
+        """
+        api_url = f"{self.base_url_api}/search/repositories"
+        params = {"q": query, "per_page": 100, "page": page}
+        content, _ = self._get(api_url, params=params)
+        search_results = _json_loads(content)
+        self.log.debug("Page: %d, Item count: %d/%d", page,
+                       len(search_results['items']), search_results['total_count'])
+        return search_results
 
-            self.log.debug("Page: %d/%d, Item count: %d/%d", current_page,
-                           total_pages, current_count, total_count)
 
-            current_page     += 1
+    def search_repositories(self, query=None):
+        self.log.info(f"Searching GitHub repositories with query: {query}")
+        search_results = self._search_page(query, 1)
+        total_count    = search_results['total_count']
+        items          = search_results['items']
+
+        # The first page tells the number of pages, so the remaining pages are
+        # requested concurrently. The search API returns up to 1000 results.
+        total_pages = math.ceil(min(total_count, 1000) / 100)
+        if total_pages > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                pages = range(2, total_pages + 1)
+                for result in executor.map(lambda p: self._search_page(query, p), pages):
+                    items.extend(result['items'])
 
-            self._check_rate_limit(response_headers)
+        return {"provider": "github", "total_count": total_count, "items": items}
 
-            if total_count == 0 or current_count >= total_count:
-                break
 
-        return {"provider": "github", "total_count": total_count, "items": items}
+    def close(self):
+        self._session.close()
+        if self._etag_cache is not None:
+            with self._etag_lock:
+                self._etag_cache.close()
+            self._etag_cache = None
 
 
     def clone_repository(self, clone_dir, owner, repo_name, retry_count=5) -> None:
         pygit2 = importlib.import_module("pygit2")
         full_name = f"{owner}/{repo_name}"
 
-        if self.checkout == False and os.path.exists(clone_dir):
+        if not self.checkout and os.path.exists(clone_dir):
             raise ValueError(f"Clone directory already exists: {clone_dir}")
 
-        # Retry cloning the repo 5 times after 1 min pause for each if it fails.
+        # Retry cloning the repo on transient errors with an exponential backoff
+        # starting at interval_clone seconds plus jitter, and give up after
+        # retry_count attempts. Permanent errors are raised right away.
         for try_count in range(retry_count):
             try:
                 if self.checkout:
-                    pygit2.Repository(clone_dir).checkout_head()
+                    # A bare repository has no working tree to check out.
+                    repository = pygit2.Repository(clone_dir)
+                    if not repository.is_bare:
+                        repository.checkout_head()
                 else:
                     pygit2.clone_repository(self.base_url_clone + "/" + full_name + ".git",
-                                          clone_dir)
-                break
+                                          clone_dir, bare=self.clone_bare,
+                                          depth=self.clone_depth)
+                return
             except Exception as e:
                 self.log.error("Failed to clone(or checkout) repo - %s : %s", full_name, e)
-                self.log.info("Retrying after 1 min... (%d/5)", try_count)
-                time.sleep(self.interval_clone)
-
-        time.sleep(self.interval_clone)
+                if not self.checkout and os.path.exists(clone_dir):
+                    # pygit2 refuses to clone into a non-empty directory, so
+                    # remove the partial clone before the next attempt.
+                    shutil.rmtree(clone_dir, ignore_errors=True)
+
+                if try_count + 1 == retry_count or _is_permanent_clone_error(e):
+                    raise
+
+                wait_secs = min(_CLONE_BACKOFF_CAP, self.interval_clone * 2 ** try_count) \
+                            + random.uniform(0, 1)
+                self.log.info("Retrying after %d seconds... (%d/%d)",
+                              wait_secs, try_count + 1, retry_count)
+                time.sleep(wait_secs)
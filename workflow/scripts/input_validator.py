@@ -1,5 +1,6 @@
 """This module is used to validate input data."""
 import os
+import stat
 
 class Validator:
     """Validator class to validate input data."""
@@ -35,16 +36,20 @@ class Validator:
                 raise ValueError("Path parameter is required.")
             return None
 
-        if not os.path.exists(given_path):
+        # A single stat tells both whether the path exists and is a directory
+        try:
+            is_dir = stat.S_ISDIR(os.stat(given_path).st_mode)
+        except OSError:
             if create:
                 try:
                     os.makedirs(given_path, exist_ok=True)
                 except Exception as e:
                     raise ValueError("Unable to create %s: %s" % (given_path, str(e)))
+                is_dir = True
             else:
                 raise ValueError("%s does not exist." % given_path)
 
-        if not os.path.isdir(given_path):
+        if not is_dir:
             raise ValueError("%s is not a directory." % given_path)
 
         return given_path
@@ -1,8 +1,19 @@
 import json
 import subprocess
 import os
+from concurrent.futures import ProcessPoolExecutor
 
-def run_git_command(repo_path, command):
+# orjson serializes the commit logs several times faster than the stdlib.
+try:
+    from orjson import dumps as _orjson_dumps
+
+    def _json_dumps_line(obj):
+        return _orjson_dumps(obj) + b"\n"
+except ImportError:
+    def _json_dumps_line(obj):
+        return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+def run_git_command(repo_path, command, input=None):
     """
     Runs a Git command in the specified repository and returns the output.
     
@@ -12,6 +23,7 @@ def run_git_command(repo_path, command):
     Parameters:
         repo_path (str): The path to the Git repository.
         command (str): The Git command to execute.
+        input (str): The text to pass to the standard input of the command.
 
     Returns:
         str: The command output if successful, otherwise an empty string.
@@ -19,6 +31,7 @@ def run_git_command(repo_path, command):
     try:
         result = subprocess.run(
             ["git", "-C", repo_path] + command.split(),
+            input=input,
             capture_output=True,
             text=True,
             check=True
@@ -27,6 +40,109 @@ def run_git_command(repo_path, command):
     except subprocess.CalledProcessError:
         return ""  # Return an empty string instead of failing the script
 
+def _numstat_path(path):
+    """
+    Returns the new path of a file in a numstat line.
+
+    Renamed files are shown as "old => new", or with the changed part in
+    braces as in "dir/{old => new}/file".
+
+    Parameters:
+        path (str): The path in the numstat line.
+
+    Returns:
+        str: The path of the file after the commit.
+    """
+    if " => " not in path:
+        return path
+
+    if "{" in path:
+        prefix, rest = path.split("{", 1)
+        renamed, suffix = rest.split("}", 1)
+        return (prefix + renamed.split(" => ")[1] + suffix).replace("//", "/")
+
+    return path.split(" => ")[1]
+
+def _name_revs(repo_path, commit_hashes):
+    """
+    Returns the names of the given commits relative to the refs, as given by
+    git name-rev, with a single git call.
+
+    Parameters:
+        repo_path (str): The path to the Git repository.
+        commit_hashes (list[str]): The commit hashes to name.
+
+    Returns:
+        dict: The name of each commit ("undefined" if it has none), or an
+        empty dictionary if the names cannot be retrieved.
+    """
+    if not commit_hashes:
+        return {}
+
+    commit_input = "\n".join(commit_hashes)
+    output = run_git_command(repo_path, "name-rev --name-only --annotate-stdin", input=commit_input)
+    if not output:
+        # --annotate-stdin was added in Git 2.35, older versions only know --stdin
+        output = run_git_command(repo_path, "name-rev --name-only --stdin", input=commit_input)
+
+    names = output.split("\n")
+    if len(names) != len(commit_hashes):
+        print(f"Warning: Could not name the commits of '{repo_path}' with git name-rev, "
+              f"their branches are reported as unknown.")
+        return {}
+
+    # Commits without a name are echoed back unchanged
+    return {commit_hash: name if name != commit_hash else "undefined"
+            for commit_hash, name in zip(commit_hashes, names)}
+
+def _tags_containing(repo_path):
+    """
+    Returns the tags that contain each commit, as given by git tag --contains,
+    with two git calls in total.
+
+    The tags of a commit are those on the commit itself and on any of its
+    descendants, so they are passed down from the children to the parents
+    while walking the commits in topological order.
+
+    Parameters:
+        repo_path (str): The path to the Git repository.
+
+    Returns:
+        dict: The set of tags containing each commit, for commits with any tag.
+    """
+    tag_refs = run_git_command(repo_path, "for-each-ref --format=%(objectname)%09%(*objectname)%09%(refname:short) refs/tags")
+    if not tag_refs:
+        return {}
+
+    own_tags = {}
+    for line in tag_refs.split("\n"):
+        object_name, peeled_name, tag = line.split("\t")
+        # Annotated tags point to the commit through the tag object
+        own_tags.setdefault(peeled_name or object_name, set()).add(tag)
+
+    # Children are listed before their parents
+    commit_graph = run_git_command(repo_path, "rev-list --topo-order --parents HEAD --tags")
+
+    tags_containing = {}
+    for line in commit_graph.split("\n"):
+        commit_hash, *parents = line.split()
+        tags = tags_containing.get(commit_hash, frozenset())
+        if commit_hash in own_tags:
+            tags = tags | own_tags[commit_hash]
+            tags_containing[commit_hash] = tags
+        if not tags:
+            continue
+
+        # A commit on a linear history shares the set of its child
+        for parent in parents:
+            parent_tags = tags_containing.get(parent)
+            if parent_tags is None or parent_tags <= tags:
+                tags_containing[parent] = tags
+            elif not tags <= parent_tags:
+                tags_containing[parent] = parent_tags | tags
+
+    return tags_containing
+
 def get_git_commits(repo_path, repo_name):
     """
     Retrieves the commit history of a Git repository and formats it as structured data.
@@ -58,89 +174,102 @@ def get_git_commits(repo_path, repo_name):
     # Ensure the repository has full history (useful for shallow clones)
     run_git_command(repo_path, "fetch --unshallow")
 
-    # Define the format for retrieving commit details
-    log_format = "%H|%an|%cn|%ad|%s|%P"
-    commit_logs = run_git_command(repo_path, f"log --pretty=format:'{log_format}' --date=iso").split("\n")
+    # Retrieve the commit details together with the line stats of the changed
+    # files in a single git log. Each commit starts with a record separator and
+    # its fields are separated by unit separators, so messages may contain any
+    # other character. Merge commits are diffed against their first parent.
+    log_format = "%x1e%an%x1f%cn%x1f%ad%x1f%s%x1f%P%x1f%H"
+    commit_logs = run_git_command(
+        repo_path,
+        f"log --pretty=format:{log_format} --date=iso --numstat --diff-merges=first-parent"
+    ).split("\x1e")
 
-    commits = []
-    for line in commit_logs:
-        parts = line.split("|")
+    records = []
+    for record in commit_logs:
+        header, _, line_stats = record.partition("\n")
+        parts = header.split("\x1f")
         if len(parts) == 6:
-            commit_hash, author, committer, date, message, parent_commit = parts
-
-            # Get branch name (returns "unknown" if commit is not on a known branch)
-            branch = run_git_command(repo_path, f"name-rev --name-only {commit_hash}") or "unknown"
-
-            # Get list of tags associated with this commit
-            tags = run_git_command(repo_path, f"tag --contains {commit_hash}").split("\n")
-            tags = [tag for tag in tags if tag]  # Filter out empty lines
-
-            # Get the list of changed files in the commit (returns ["unknown"] if missing)
-            changed_files = run_git_command(repo_path, f"show --pretty=format: --name-only {commit_hash}").split("\n")
-            changed_files = [file for file in changed_files if file] or ["unknown"]
-
-            # Get number of lines added/deleted in the commit (returns 0 if missing)
-            line_stats = run_git_command(repo_path, f"show --numstat --pretty=format: {commit_hash}").split("\n")
-            lines_added, lines_deleted = 0, 0
-            for stat in line_stats:
-                parts = stat.split("\t")
-                if len(parts) == 3:
-                    try:
-                        lines_added += int(parts[0]) if parts[0] != "-" else 0
-                        lines_deleted += int(parts[1]) if parts[1] != "-" else 0
-                    except ValueError:
-                        pass  # Ignore conversion errors for binary files
-
-            # Determine if this is a merge commit (if it has more than one parent)
-            is_merge_commit = len(parent_commit.split()) > 1
-            merged_branch = run_git_command(repo_path, f"name-rev --name-only {parent_commit.split()[0]}") if is_merge_commit else ""
-
-            # Store commit metadata in a structured dictionary
-            commits.append({
-                "repo_name": repo_name,             # Repository name
-                "commit_hash": commit_hash,         # Unique commit identifier
-                "author": author,                   # Author of the commit
-                "committer": committer,             # Who applied the commit (may differ in rebases)
-                "date": date,                       # Timestamp of the commit
-                "message": message,                 # Commit message
-                "parent_commit": parent_commit,     # Parent commit(s)
-                "branch": branch,                   # Branch name (if available)
-                "tags": tags or [],                 # List of associated tags
-                "changed_files": changed_files,     # List of modified files
-                "lines_added": lines_added,         # Number of lines added
-                "lines_deleted": lines_deleted,     # Number of lines deleted
-                "is_merge_commit": is_merge_commit, # Whether the commit is a merge commit
-                "merged_branch": merged_branch if is_merge_commit else None  # Merged branch (if applicable)
-            })
+            records.append((parts, line_stats))
+
+    # Get the branch names (relative to the refs) and the tags of all commits at once
+    branches = _name_revs(repo_path, [parts[5] for parts, _ in records])
+    tags_containing = _tags_containing(repo_path)
+
+    commits = []
+    for parts, line_stats in records:
+        author, committer, date, message, parent_commit, commit_hash = parts
+
+        # Get branch name (returns "unknown" if commit is not on a known branch)
+        branch = branches.get(commit_hash) or "unknown"
+
+        # Get list of tags associated with this commit
+        tags = sorted(tags_containing.get(commit_hash, ()))
+
+        # Get the changed files (["unknown"] if missing) and the number of
+        # lines added/deleted (0 if missing) from the line stats
+        changed_files = []
+        lines_added, lines_deleted = 0, 0
+        for stat in line_stats.split("\n"):
+            parts = stat.split("\t")
+            if len(parts) == 3:
+                changed_files.append(_numstat_path(parts[2]))
+                try:
+                    lines_added += int(parts[0]) if parts[0] != "-" else 0
+                    lines_deleted += int(parts[1]) if parts[1] != "-" else 0
+                except ValueError:
+                    pass  # Ignore conversion errors for binary files
+        changed_files = changed_files or ["unknown"]
+
+        # Determine if this is a merge commit (if it has more than one parent)
+        is_merge_commit = len(parent_commit.split()) > 1
+        merged_branch = branches.get(parent_commit.split()[0], "") if is_merge_commit else ""
+
+        # Store commit metadata in a structured dictionary
+        commits.append({
+            "repo_name": repo_name,             # Repository name
+            "commit_hash": commit_hash,         # Unique commit identifier
+            "author": author,                   # Author of the commit
+            "committer": committer,             # Who applied the commit (may differ in rebases)
+            "date": date,                       # Timestamp of the commit
+            "message": message,                 # Commit message
+            "parent_commit": parent_commit,     # Parent commit(s)
+            "branch": branch,                   # Branch name (if available)
+            "tags": tags or [],                 # List of associated tags
+            "changed_files": changed_files,     # List of modified files
+            "lines_added": lines_added,         # Number of lines added
+            "lines_deleted": lines_deleted,     # Number of lines deleted
+            "is_merge_commit": is_merge_commit, # Whether the commit is a merge commit
+            "merged_branch": merged_branch if is_merge_commit else None  # Merged branch (if applicable)
+        })
 
     return commits
 
 def process_all_repositories(cloned_repos_dir, output_file):
     """
-    Processes all cloned repositories, extracts commit logs, and saves them to a single JSON file.
+    Processes all cloned repositories, extracts commit logs, and saves them to a single JSON Lines file.
 
     This function:
     - Iterates through all cloned repositories.
     - Extracts commit history and relevant metadata.
-    - Stores all commit logs in a structured JSON file.
+    - Writes each commit log as one compact JSON object per line, as soon as
+      the commits of a repository are fetched.
 
     Parameters:
         cloned_repos_dir (str): Path to the directory containing cloned repositories.
-        output_file (str): Path to the output JSON file where commit logs will be saved.
+        output_file (str): Path to the output JSON Lines (.jsonl) file where commit logs will be saved.
     """
-    all_commits = []
-
     print("Processing repositories...\n")
-    for repo_name in os.listdir(cloned_repos_dir):
-        repo_path = os.path.join(cloned_repos_dir, repo_name)
-        if os.path.isdir(repo_path):
-            print(f"Fetching commits for: {repo_name}")
-            commits = get_git_commits(repo_path, repo_name)
-            if commits:
-                all_commits.extend(commits)
-
-    # Save all collected commit logs into a single JSON file
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(all_commits, f, indent=4)
-
-    print(f"Successfully saved commit logs from all repositories to {output_file}")
\ No newline at end of file
+    repo_names = [repo_name for repo_name in os.listdir(cloned_repos_dir)
+                  if os.path.isdir(os.path.join(cloned_repos_dir, repo_name))]
+    repo_paths = [os.path.join(cloned_repos_dir, repo_name) for repo_name in repo_names]
+
+    # Each repository is independent, so fetch the commits of several
+    # repositories at once, one per CPU core
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor, \
+         open(output_file, "wb") as f:
+        for repo_name, commits in zip(repo_names, executor.map(get_git_commits, repo_paths, repo_names)):
+            print(f"Fetched commits for: {repo_name}")
+            for commit in commits:
+                f.write(_json_dumps_line(commit))
+
+    print(f"Successfully saved commit logs from all repositories to {output_file}")
@@ -1,17 +1,48 @@
 """This module contains the Storage class and driver classes for storage"""
 import os
-import sys
 import json
 import pathlib
 import logging
 from abc import ABC, abstractmethod
 from typing import Union
 
+# Default logger of the classes in this module.
+_LOG = logging.getLogger(__name__)
+
+# orjson parses and serializes large JSON files several times faster than
+# the stdlib, and works on bytes directly.
+try:
+    import orjson
+
+    def _json_dumps(data):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(data):
+        return json.dumps(data, indent=4).encode("utf-8")
+
+    _json_loads = json.loads
+
+# Driver classes by engine name, filled in by the register_driver decorator.
+_DRIVERS = {}
+
+
+def register_driver(engine):
+    """
+    Register a driver class under the given engine name.
+    """
+    def decorator(driver_class):
+        _DRIVERS[engine.lower()] = driver_class
+        return driver_class
+    return decorator
+
+
 class StorageDriverBase(ABC):
     """
     Abstract base class for storage drivers.
     """
-    def __init__(self, logger=logging.getLogger(), engine=None,
+    def __init__(self, logger=_LOG, engine=None,
                  storage_config=None):
 
         if not engine:
@@ -50,6 +81,7 @@ class StorageDriverBase(ABC):
         """
 
 
+@register_driver("file")
 class FileDriver(StorageDriverBase):
     """
     Storage driver for File:
@@ -58,7 +90,7 @@ class FileDriver(StorageDriverBase):
             is_absolute: If True, rootdir is absolute path.
             mkdir_ok: If True, create rootdir if not exists.
     """
-    def __init__(self, logger=logging.getLogger(), engine=None,
+    def __init__(self, logger=_LOG, engine=None,
                  storage_config=None):
 
         super().__init__(logger, engine, storage_config)
@@ -69,6 +101,7 @@ class FileDriver(StorageDriverBase):
         self.is_absolute = storage_config.get("is_absolute", False)
         self.mkdir_ok = storage_config.get("mkdir_ok", False)
         self.rootdir = storage_config.get("rootdir", None)
+        self._root = pathlib.Path(self.rootdir) if self.rootdir else None
 
         if not self.is_absolute and not self.rootdir:
             raise ValueError("rootdir or is_absolute is required in storage_config")
@@ -76,7 +109,7 @@ class FileDriver(StorageDriverBase):
         self.log.debug("FileDriver configs: %s", storage_config)
 
         if self.rootdir:
-            path = pathlib.Path(self.rootdir)
+            path = self._root
             if not path.exists():
                 if self.mkdir_ok:
                     try:
@@ -100,18 +133,16 @@ class FileDriver(StorageDriverBase):
         if self.is_absolute:
             path_handler = pathlib.Path(path)
         else:
-            if path.startswith("/"):
-                path = path[1:]
-            path_handler = pathlib.Path(self.rootdir) / path
+            path_handler = self._root / path.lstrip("/")
 
         if not path_handler.exists():
             raise FileNotFoundError(f"File not found: {path_handler}")
 
+        if from_json:
+            return _json_loads(path_handler.read_bytes())
+
         absolute_path = str(path_handler)
         with open(absolute_path, mode, encoding='UTF-8') as f:
-            if from_json:
-                return json.load(f)
-
             if multiple_lines:
                 return [line.strip() for line in f.readlines()]
 
@@ -132,22 +163,23 @@ class FileDriver(StorageDriverBase):
         if self.is_absolute:
             path_handler = pathlib.Path(path)
         else:
-            if path.startswith("/"):
-                path = path[1:]
-            path_handler = pathlib.Path(self.rootdir) / path
+            path_handler = self._root / path.lstrip("/")
 
         if not path_handler.parent.exists():
             if self.mkdir_ok:
-                path_handler.parent.mkdir(parents=True)
+                path_handler.parent.mkdir(parents=True, exist_ok=True)
             else:
                 raise FileNotFoundError(f"Directory not found: {path_handler.parent}")
 
         data_type = type(data)
         absolute_path = str(path_handler)
+        if data_type == dict or to_json or (data_type == list and data and type(data[0]) == dict):
+            with open(absolute_path, mode + 'b') as f:
+                f.write(_json_dumps(data))
+            return
+
         with open(absolute_path, mode, encoding='UTF-8') as f:
-            if data_type == dict or to_json:
-                json.dump(data, f, indent=4)
-            elif data_type == list:
+            if data_type == list:
                 for line in data:
                     line = line.strip()
                     f.write(f"{line}\n")
@@ -177,7 +209,7 @@ class Storage(StorageDriverBase):
     """
     Storage class to interact with storage using the driver.
     """
-    def __init__(self, logger=logging.getLogger(), engine=None,
+    def __init__(self, logger=_LOG, engine=None,
                  storage_config=None):
 
         super().__init__(logger, engine, storage_config)
@@ -188,14 +220,12 @@ class Storage(StorageDriverBase):
         """
         Create a storage driver instance based on the engine type.
         """
-        driver_class_name = engine.capitalize() + "Driver"
-        module            = sys.modules[__name__]
-        driver_class      = getattr(module, driver_class_name, None)
+        driver_class = _DRIVERS.get(engine.lower())
 
         if not driver_class:
             raise ValueError(f"Unsupported storage engine: {engine}")
 
-        self.log.info(f"Using storage driver: {driver_class_name}")
+        self.log.info(f"Using storage driver: {driver_class.__name__}")
         return driver_class(logger, self.engine, storage_config)
 
 
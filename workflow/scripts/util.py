@@ -1,25 +1,78 @@
 """ various utility functions. """
 import os
 import json
+import time
+import queue
+import atexit
 import logging
-from datetime import datetime, timedelta
+import functools
+import importlib
+import calendar
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson parses large JSON files several times faster than the stdlib.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Session shared by all downloads, keeping the connections to a host alive
+# and retrying transient server errors.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                                       max_retries=Retry(total=3, backoff_factor=0.3,
+                                                         status_forcelist=[429, 500, 502, 503, 504])))
 
 LOG_FORMAT = "[%(asctime)s] %(levelname)s - %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+_FORMATTER = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
 
+# The logger set up by setup_logger, used by the functions in this module.
+_LOG = logging.getLogger("default")
+
+# Steps of the date range generators, built once instead of on every range.
+_ONE_DAY = timedelta(days=1)
+_ONE_WEEK = timedelta(days=7)
+
+@functools.lru_cache(maxsize=65536)
 def str_to_datetime(date_str=None, fmt="%Y-%m-%d"):
     """
     Convert a string to a date object.
+    The results are cached, since the same dates are converted over and over,
+    and "%Y-%m-%d" dates are parsed by fromisoformat instead of strptime.
     :param date_str: The date string.
     :param format: The format of the date string.
     :return: The date object.
     """
     if not date_str:
         return None
+
+    if fmt == "%Y-%m-%d" and len(date_str) == 10 and date_str[4] == date_str[7] == "-":
+        return datetime.fromisoformat(date_str)
+
     return datetime.strptime(date_str, fmt)
 
 
+def utc_str_to_epoch(date_str=None):
+    """
+    Convert a UTC date string in the "%Y-%m-%dT%H:%M:%SZ" format to an epoch time.
+    The fields are sliced out directly instead of going through strptime.
+    :param date_str: The date string.
+    :return: The epoch time.
+    """
+    if not date_str:
+        return None
+
+    return calendar.timegm((int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]),
+                            int(date_str[11:13]), int(date_str[14:16]), int(date_str[17:19]),
+                            0, 0, 0))
+
+
 def epoch_to_str(epoch=None, fmt="%Y-%m-%dT%H:%M:%S %z"):
     """
     Convert an epoch time to a string.
@@ -59,11 +112,12 @@ def now(is_epoch=False, fractional=False, fmt="%Y-%m-%dT%H:%M:%S %z"):
     :return: The current date and time
     """
     if is_epoch:
+        # time.time() gives the same epoch time without building a datetime.
         if fractional:
-            return datetime.now().timestamp()
+            return time.time()
         else:
             # Return the epoch time as an integer
-            return int(datetime.now().timestamp())
+            return int(time.time())
     else:
         return datetime.now().strftime(fmt)
 
@@ -74,38 +128,203 @@ def setup_logger(log_level="INFO"):
     :param log_level: "INFO", "DEBUG", "WARNING", "ERROR", "CRITICAL"
     :return: The logger object.
     """
-    log = logging.getLogger("default")
+    log = _LOG
 
     if "DEBUG" in os.environ:
         log_level = "DEBUG"
 
     log.setLevel(log_level)
-    formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    log.addHandler(console_handler)
+
+    # Add the console handler only once, so that setting up the logger again
+    # does not print every message twice. Records are passed through a queue
+    # to a listener thread that writes them, so logging does not block the
+    # calling threads on formatting and console output.
+    if not log.handlers:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(_FORMATTER)
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        log.addHandler(QueueHandler(log_queue))
 
     return log
 
 
-def download_http_file(url, file_path):
+def _read_validators(validators_path):
+    """
+    Read the ETag and Last-Modified saved for a downloaded file.
+    :param validators_path: The path of the sidecar file.
+    :return: The conditional request headers, empty if nothing was saved.
+    """
+    try:
+        with open(validators_path, 'rb') as file:
+            validators = _json_loads(file.read())
+    except (OSError, ValueError):
+        return {}
+
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def _write_validators(validators_path, response_headers):
+    """
+    Save the ETag and Last-Modified of a downloaded file next to it.
+    :param validators_path: The path of the sidecar file.
+    :param response_headers: The headers of the download response.
+    """
+    etag = response_headers.get("ETag")
+    last_modified = response_headers.get("Last-Modified")
+    if not etag and not last_modified:
+        return
+
+    with open(validators_path, 'w') as file:
+        json.dump({"etag": etag, "last_modified": last_modified}, file)
+
+
+def download_http_file(url, file_path, session=None):
     """
     Download a file from a URL.
+    The ETag and Last-Modified of the download are kept in "<file_path>.etag",
+    and a file that was not modified since is not downloaded again.
     :param url: The URL of the file.
     :param file_path: The path to save the file.
+    :param session: The requests.Session to download with, or None to use the
+                    session shared by all downloads.
+    :return: True if the file was downloaded, False if it was not modified.
     """
+    http = session if session is not None else _SESSION
+    validators_path = f"{file_path}.etag"
+    headers = _read_validators(validators_path) if os.path.exists(file_path) else {}
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        response = http.get(url, headers=headers, timeout=10, stream=True)
     except requests.exceptions.RequestException as e:
-        raise Exception(f"Error downloading file: {e}")
+        raise Exception(f"Error downloading file: {e}") from e
+
+    with response:
+        if response.status_code == 304:
+            _LOG.debug("File not modified: %s", file_path)
+            return False
+
+        # Reject error statuses before the file is opened, so an error page is
+        # never written to disk and its connection is released.
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            raise Exception(f"Error downloading file: {e}") from e
+
+        # The validators of the previous download no longer match the file
+        # once a new body is written, so they are only saved again after the
+        # new file is complete.
+        if os.path.exists(validators_path):
+            os.remove(validators_path)
+
+        # Write the body to a temporary file while it is received instead of
+        # holding it in memory as a whole, and move it into place only once it
+        # is complete, so a dropped connection never leaves a partial file.
+        part_path = f"{file_path}.part"
+        try:
+            with open(part_path, 'wb') as file:
+                for chunk in response.iter_content(chunk_size=100 * 1024):
+                    file.write(chunk)
+            os.replace(part_path, file_path)
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Error downloading file: {e}") from e
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        _write_validators(validators_path, response.headers)
+    _LOG.debug("File downloaded: %s", file_path)
+    return True
+
+
+def download_http_files(url_path_pairs, max_workers=8):
+    """
+    Download several files at once, sharing the pooled connections.
+    :param url_path_pairs: The (url, file_path) pairs of the files to download.
+    :param max_workers: The number of files to download at the same time.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda pair: download_http_file(*pair), url_path_pairs))
 
-    try:
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.write(response.content.decode('utf-8'))
-            logging.debug("File downloaded: %s", file_path)
-    except Exception as e:
-        raise Exception(f"Error downloading file: {e}")
+
+def _monthly_date_ranges(start_date, end_date):
+    """
+    Yield the [start, end] dates of each month from start_date to end_date.
+    """
+    current_date = start_date
+    while current_date <= end_date:
+        days_in_month = calendar.monthrange(current_date.year, current_date.month)[1]
+        month_end = current_date.replace(day=days_in_month)
+        yield [current_date, min(month_end, end_date)]
+        current_date = month_end + _ONE_DAY
+
+
+def _strided_date_ranges(start_date, end_date, align, stride):
+    """
+    Yield the [start, end] dates of each fixed-length period from the period
+    of start_date to end_date.
+    :param start_date: The start date.
+    :param end_date: The end date.
+    :param align: A function returning the first day of the period of a date.
+    :param stride: The length of a period as a timedelta.
+    """
+    if start_date > end_date:
+        return
+
+    # Only the first period needs aligning, every later period starts one
+    # stride after the one before.
+    period_last_day = stride - _ONE_DAY
+    period_start = align(start_date)
+    while period_start <= end_date:
+        yield [period_start, min(period_start + period_last_day, end_date)]
+        period_start += stride
+
+
+def _monday_of(day):
+    """
+    Return the Monday of the week of a date.
+    """
+    return day - timedelta(days=day.weekday())
+
+
+def _daily_date_ranges(start_date, end_date):
+    """
+    Yield the [start, end] dates of each day from start_date to end_date.
+    Days map one to one to ordinals, so they are built by date.fromordinal
+    from a range of integers, which is faster than _strided_date_ranges with
+    a one-day stride.
+    """
+    for day in map(date.fromordinal, range(start_date.toordinal(), end_date.toordinal() + 1)):
+        yield [day, day]
+
+
+# Date range generators by interval: 'm' (month), 'w' (week), 'd' (day)
+_DATE_RANGE_GENERATORS = {
+    'm': _monthly_date_ranges,
+    'w': functools.partial(_strided_date_ranges, align=_monday_of, stride=_ONE_WEEK),
+    'd': _daily_date_ranges,
+}
+
+
+def iter_date_ranges(start_date, end_date, interval):
+    """
+    Yield the date ranges based on the specified interval one by one, without
+    building a list of all of them.
+    :param start_date: The start date.
+    :param end_date: The end date.
+    :param interval: The interval for creating date ranges.
+    :return: An iterator of [start, end] dates for each interval.
+    """
+    date_range_generator = _DATE_RANGE_GENERATORS.get(interval)
+    if date_range_generator is None:
+        return iter(())
+
+    return date_range_generator(start_date, end_date)
 
 
 def generate_date_ranges(start_date, end_date, interval):
@@ -116,30 +335,39 @@ def generate_date_ranges(start_date, end_date, interval):
     :param interval: The interval for creating date ranges.
     :return: A list of tuples with start and end dates for each interval.
     """
-    date_ranges = []
-    current_date = start_date
+    return list(iter_date_ranges(start_date, end_date, interval))
 
-    if interval == 'm':
-        while current_date <= end_date:
-            next_month = datetime(current_date.year + (current_date.month // 12),
-                                  (current_date.month % 12) + 1, 1).date()
-            month_end = min(next_month - timedelta(days=1), end_date)
-            date_ranges.append([current_date, month_end])
-            current_date = next_month
 
-    elif interval == 'w':
-        while current_date <= end_date:
-            week_start = current_date - timedelta(days=current_date.weekday())
-            week_end = min(week_start + timedelta(days=6), end_date)
-            date_ranges.append([week_start, week_end])
-            current_date = week_end + timedelta(days=1)
+def generate_date_ranges_np(start_date, end_date, interval):
+    """
+    Generate the same date ranges as generate_date_ranges, as two NumPy
+    datetime64[D] arrays of the start and end dates, for vectorized use.
+    :param start_date: The start date.
+    :param end_date: The end date.
+    :param interval: The interval for creating date ranges.
+    :return: A tuple of the arrays of start dates and end dates.
+    """
+    np = importlib.import_module("numpy")
+    start = np.datetime64(start_date, 'D')
+    end = np.datetime64(end_date, 'D')
+    if start > end or interval not in _DATE_RANGE_GENERATORS:
+        return np.array([], dtype='datetime64[D]'), np.array([], dtype='datetime64[D]')
 
-    elif interval == 'd':
-        while current_date <= end_date:
-            date_ranges.append([current_date, current_date])
-            current_date += timedelta(days=1)
+    if interval == 'm':
+        months = np.arange(start.astype('datetime64[M]'), end.astype('datetime64[M]') + 1)
+        starts = months.astype('datetime64[D]')
+        starts[0] = start
+        ends = np.minimum((months + 1).astype('datetime64[D]') - 1, end)
+    elif interval == 'w':
+        # The epoch (day 0) is a Thursday, so Monday-based weekdays are offset by 3.
+        week_start = start - (start.astype('int64') + 3) % 7
+        starts = np.arange(week_start, end + 1, 7)
+        ends = np.minimum(starts + 6, end)
+    else:
+        starts = np.arange(start, end + 1)
+        ends = starts.copy()
 
-    return date_ranges
+    return starts, ends
 
 
 def merge_skiplist(file_blacklist=None, file_skiplist=None):
@@ -149,20 +377,20 @@ def merge_skiplist(file_blacklist=None, file_skiplist=None):
     :param file_skiplist: The skiplist file.
     :return: The merged list.
     """
-    blacklist = []
-    skiplist  = []
+    blacklist = set()
+    skiplist  = set()
     if file_blacklist:
         # blacklist is a txt file
         with open(file_blacklist, 'r', encoding='utf-8') as file:
-            blacklist = file.read().splitlines()
+            blacklist = set(file.read().splitlines())
 
     if file_skiplist:
         # skiplist is a json file
-        with open(file_skiplist, 'r', encoding='utf-8') as file:
-            json_data = json.load(file)
-            skiplist = [repo['full_name'] for repo in json_data]
+        with open(file_skiplist, 'rb') as file:
+            json_data = _json_loads(file.read())
+            skiplist = {repo['full_name'] for repo in json_data}
 
-    return list(set(blacklist) | set(skiplist))
+    return list(blacklist | skiplist)
 
 
 def convert_list_to_dict(src_list=None, key=None):
@@ -175,8 +403,4 @@ def convert_list_to_dict(src_list=None, key=None):
     if not src_list or not key:
         return {}
 
-    new_dict = {}
-    for element in src_list:
-        new_dict[element[key]] = element
-
-    return new_dict
+    return {element[key]: element for element in src_list}